@@ -1,11 +1,18 @@
 from django.contrib import admin
+from django.db import models
 
-from .models import Category, Comment, Location, Post
+from .forms import ImageUploadField
+from .models import Category, Comment, ImageJob, Location, Post
+
+IMAGE_UPLOAD_OVERRIDES = {
+    models.ImageField: {'form_class': ImageUploadField},
+}
 
 
 class PostInline(admin.TabularInline):
     model = Post
     extra = 0
+    formfield_overrides = IMAGE_UPLOAD_OVERRIDES
 
 
 class CommentInLine(admin.StackedInline):
@@ -28,6 +35,7 @@ class PostAdmin(admin.ModelAdmin):
         'pub_date',
     )
     exclude = ('comment_count',)
+    formfield_overrides = IMAGE_UPLOAD_OVERRIDES
     list_editable = (
         'location',
         'category',
@@ -69,8 +77,22 @@ class CommentAdmin(admin.ModelAdmin):
     )
 
 
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'post',
+        'status',
+        'attempts',
+        'created_at',
+        'started_at',
+    )
+    list_filter = (
+        'status',
+    )
+
+
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Location, LocationAdmin)
 admin.site.register(Post, PostAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(ImageJob, ImageJobAdmin)
 admin.site.empty_value_display = 'Не задано'
@@ -1,7 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate, pre_migrate
 
 
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        from .triggers import drop_sqlite_triggers, restore_sqlite_triggers
+
+        pre_migrate.connect(drop_sqlite_triggers, sender=self)
+        post_migrate.connect(restore_sqlite_triggers, sender=self)
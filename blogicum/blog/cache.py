@@ -0,0 +1,202 @@
+import hashlib
+import math
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from django.views.decorators.http import condition
+
+NOTHING_SCHEDULED = 'nothing'
+
+POST_PAGE_TAGS = ('posts', 'categories', 'locations', 'users', 'comments')
+
+
+def get_version(*tags):
+    keys = [f'version:{tag}' for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def bump_version(*tags):
+    cache.set_many(
+        {f'version:{tag}': time.time_ns() for tag in tags},
+        None,
+    )
+
+
+def get_changed_at(*tags):
+    """Время последнего изменения объектов с метками tags.
+
+    Версия метки — время её последнего сброса в наносекундах, поэтому
+    оно растёт и при удалении объектов, которых уже нет на странице.
+    """
+    stamps = get_version(*tags).split('.')
+    return datetime.fromtimestamp(
+        max(map(int, stamps)) / 10 ** 9, timezone.utc
+    )
+
+
+def timeout_until(timeout, moment):
+    if moment is None:
+        return timeout
+    seconds = math.ceil((moment - timezone.now()).total_seconds())
+    return max(1, seconds if timeout is None else min(timeout, seconds))
+
+
+def get_next_publication(listing_key, posts):
+    """Ближайшая отложенная публикация среди posts.
+
+    Значение кешируется до момента публикации или до изменения публикаций
+    и категорий, поэтому обычно не требует запроса к базе данных.
+    """
+    version = get_version('posts', 'categories')
+    key = f'next_publication:{version}:{listing_key}'
+    moment = cache.get(key)
+    if moment is None:
+        moment = posts.next_publication() or NOTHING_SCHEDULED
+        timeout = None
+        if moment != NOTHING_SCHEDULED:
+            timeout = timeout_until(None, moment)
+        cache.set(key, moment, timeout)
+    return None if moment == NOTHING_SCHEDULED else moment
+
+
+def get_object_state(obj):
+    if obj is None:
+        return None
+    updated_at = getattr(obj, 'updated_at', None)
+    if updated_at is None:
+        return (obj.pk, obj.get_username(), obj.get_full_name(), obj.is_staff)
+    return (obj._meta.label, obj.pk, updated_at)
+
+
+def get_post_card_key(post):
+    """Ключ карточки из состояния публикации и связанных с ней объектов.
+
+    Изменение одной публикации, категории, места или автора сбрасывает
+    только карточки, которые их показывают.
+    """
+    state = [
+        get_object_state(obj)
+        for obj in (post, post.category, post.location, post.author)
+    ]
+    state.append(post.comment_count)
+    return f'post_card:{hashlib.md5(repr(state).encode()).hexdigest()}'
+
+
+def get_validators(request, posts, *objects):
+    """ETag и Last-Modified страницы по уже загруженным объектам.
+
+    posts — публикации или страница пагинатора, objects — прочие объекты
+    и значения, от которых зависит содержимое (категория, профиль).
+    Last-Modified не меньше времени последнего изменения публикаций и
+    связанных с ними объектов: иначе после удаления публикации или сдвига
+    страницы он бы не вырос и запрос с If-Modified-Since получил бы 304.
+    """
+    now = timezone.now()
+    state = [request.user.pk]
+    changed = [get_changed_at(*POST_PAGE_TAGS)]
+    for obj in objects:
+        state.append(get_object_state(obj) if hasattr(obj, 'pk') else obj)
+        changed.append(getattr(obj, 'updated_at', None))
+    if hasattr(posts, 'has_next'):
+        paginator = getattr(posts, 'paginator', None)
+        state.append((
+            posts.has_previous(),
+            posts.has_next(),
+            paginator and paginator.count,
+        ))
+    for post in posts:
+        related = (post, post.category, post.location, post.author)
+        state.append([get_object_state(obj) for obj in related])
+        state.append(post.comment_count)
+        changed.extend(getattr(obj, 'updated_at', None) for obj in related)
+        if post.pub_date <= now:
+            changed.append(post.pub_date)
+    etag = hashlib.md5(repr(state).encode()).hexdigest()
+    return etag, max(filter(None, changed), default=None)
+
+
+class AnonymousPageCacheMixin:
+    """Кеширует страницу целиком для анонимных посетителей."""
+
+    cache_tags = ()
+
+    def get_page_cache_timeout(self):
+        return settings.ANONYMOUS_PAGE_CACHE_TIMEOUT
+
+    def dispatch(self, request, *args, **kwargs):
+        if (
+            not settings.ANONYMOUS_PAGE_CACHE_TIMEOUT
+            or request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+        ):
+            return super().dispatch(request, *args, **kwargs)
+        url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        key = f'page:{get_version(*self.cache_tags)}:{url}'
+        response = cache.get(key)
+        if response is not None:
+            return get_conditional_response(
+                request,
+                etag=response.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    response.get('Last-Modified')
+                ),
+                response=response,
+            )
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code != 200 or response.cookies:
+            return response
+        timeout = self.get_page_cache_timeout()
+
+        def store(response):
+            if not request.META.get('CSRF_COOKIE_USED'):
+                cache.set(key, response, timeout)
+
+        if getattr(response, 'is_rendered', True):
+            store(response)
+        else:
+            response.add_post_render_callback(store)
+        return response
+
+
+class PostPageCacheMixin(AnonymousPageCacheMixin):
+    cache_tags = POST_PAGE_TAGS
+
+    def get_next_publication(self):
+        return None
+
+    def get_page_cache_timeout(self):
+        return timeout_until(
+            super().get_page_cache_timeout(),
+            self.get_next_publication(),
+        )
+
+
+class ConditionalGetMixin:
+    """Отвечает 304 Not Modified, не отрисовывая шаблон.
+
+    Представление возвращает из get_validators() пару (ETag, Last-Modified),
+    вычисленную по тем же объектам, что затем попадут в контекст.
+    """
+
+    def get_validators(self):
+        return None, None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        etag, last_modified = self.get_validators()
+        dispatch = condition(
+            etag_func=lambda *args, **kwargs: etag,
+            last_modified_func=lambda *args, **kwargs: last_modified,
+        )(super().dispatch)
+        return dispatch(request, *args, **kwargs)
@@ -0,0 +1,24 @@
+from django.core.checks import Error, Tags, register
+from django.db import connections
+
+from .triggers import get_missing_triggers
+
+
+@register(Tags.database)
+def check_comment_count_triggers(app_configs, databases=None, **kwargs):
+    errors = []
+    for alias in databases or ():
+        missing = get_missing_triggers(connections[alias])
+        if missing:
+            errors.append(Error(
+                'Нет триггеров счётчика комментариев: '
+                f'{", ".join(sorted(missing))}.',
+                hint=(
+                    'На SQLite их восстанавливает команда migrate; на других '
+                    'СУБД пересоздайте их, откатив и применив миграцию '
+                    'blog.0023, и выполните recount_comments.'
+                ),
+                obj=alias,
+                id='blog.E001',
+            ))
+    return errors
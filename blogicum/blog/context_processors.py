@@ -0,0 +1,7 @@
+from django.conf import settings
+
+
+def post_cards(request):
+    return {
+        'post_card_timeout': settings.POST_CARD_CACHE_TIMEOUT,
+    }
@@ -1,8 +1,83 @@
+import math
+import warnings
+
+from core.uploadhandlers import OversizedUploadedFile
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
 
 from .models import Category, Comment, Location, Post
 
 
+def read_image_header(data):
+    """Формат и число пикселей по заголовку файла.
+
+    Пиксели не декодируются: файл целиком проверяет обработчик очереди
+    изображений. Для нечитаемого заголовка возвращает None.
+    """
+    if hasattr(data, 'temporary_file_path'):
+        source = data.temporary_file_path()
+    else:
+        source = data
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+            with Image.open(source) as image:
+                return image.format, image.width * image.height
+    except Image.DecompressionBombError:
+        return None, math.inf
+    except Exception:
+        return None
+    finally:
+        if source is data:
+            data.seek(0)
+
+
+class ImageUploadField(forms.ImageField):
+    """Поле изображения с ограничением размера файла и числа пикселей.
+
+    В отличие от forms.ImageField, не вызывает verify() и не читает файл
+    целиком: в запросе проверяется только заголовок изображения.
+    """
+
+    default_error_messages = {
+        'too_large': 'Размер файла не должен превышать %(limit)s.',
+        'too_many_pixels': (
+            'Изображение должно быть не больше %(limit)s мегапикселей.'
+        ),
+    }
+
+    def to_python(self, data):
+        data = forms.FileField.to_python(self, data)
+        if data is None:
+            return None
+        if (
+            isinstance(data, OversizedUploadedFile)
+            or data.size > settings.MAX_UPLOAD_SIZE
+        ):
+            raise forms.ValidationError(
+                self.error_messages['too_large'],
+                code='too_large',
+                params={'limit': filesizeformat(settings.MAX_UPLOAD_SIZE)},
+            )
+        header = read_image_header(data)
+        if header is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_image'], code='invalid_image'
+            )
+        image_format, pixels = header
+        if pixels > settings.MAX_IMAGE_PIXELS:
+            raise forms.ValidationError(
+                self.error_messages['too_many_pixels'],
+                code='too_many_pixels',
+                params={'limit': f'{settings.MAX_IMAGE_PIXELS / 1e6:g}'},
+            )
+        if hasattr(data, 'content_type'):
+            data.content_type = Image.MIME.get(image_format)
+        return data
+
+
 class CreateOrEditPostForm(forms.ModelForm):
 
     class Meta:
@@ -11,6 +86,9 @@ class CreateOrEditPostForm(forms.ModelForm):
             'author',
             'comment_count'
         )
+        field_classes = {
+            'image': ImageUploadField,
+        }
         widgets = {
             'pub_date': forms.DateTimeInput(
                 attrs={'type': 'datetime-local'},
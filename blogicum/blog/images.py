@@ -0,0 +1,92 @@
+import logging
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+RENDITION_WIDTHS = (320, 640, 1280)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 90
+REENCODED_FORMATS = ('JPEG', 'PNG', 'WEBP')
+UNREADABLE_IMAGE_ERRORS = (
+    OSError,
+    UnidentifiedImageError,
+    Image.DecompressionBombError,
+)
+
+
+def get_rendition_widths(width):
+    widths = {w for w in RENDITION_WIDTHS if w < width}
+    widths.add(min(width, max(RENDITION_WIDTHS)))
+    return sorted(widths)
+
+
+def open_image(name, storage=default_storage):
+    with storage.open(name) as file:
+        image = Image.open(file)
+        if image.width * image.height > settings.MAX_IMAGE_PIXELS:
+            raise Image.DecompressionBombError(
+                f'{image.width}x{image.height} больше MAX_IMAGE_PIXELS'
+            )
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    return image, image_format
+
+
+def save_image(image, name, image_format, storage=default_storage, **params):
+    if image_format != 'PNG' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    if image_format == 'JPEG':
+        image = image.convert('RGB')
+    content = BytesIO()
+    image.save(content, image_format, **params)
+    return storage.save(name, ContentFile(content.getvalue()))
+
+
+def save_renditions(image, name, storage=default_storage):
+    path = PurePosixPath(name)
+    renditions = {}
+    for width in get_rendition_widths(image.width):
+        height = max(1, round(image.height * width / image.width))
+        renditions[str(width)] = save_image(
+            image.resize((width, height), Image.Resampling.LANCZOS),
+            str(path.with_suffix('.webp')),
+            'WEBP',
+            storage,
+            quality=WEBP_QUALITY,
+        )
+    return renditions
+
+
+def make_renditions(name, storage=default_storage):
+    """Сохраняет уменьшенные копии изображения в WebP.
+
+    Возвращает словарь {ширина: имя файла}; если файл не удаётся прочитать
+    как изображение, словарь пустой.
+    """
+    try:
+        image, _ = open_image(name, storage)
+    except UNREADABLE_IMAGE_ERRORS:
+        logger.warning('Не удалось прочитать изображение %s', name)
+        return {}
+    return save_renditions(image, name, storage)
+
+
+def process_upload(name, storage=default_storage):
+    """Перекодирует загруженное изображение без EXIF и создаёт его копии.
+
+    Возвращает имя очищенного файла и словарь копий. Исходный файл
+    не удаляется: его может использовать другая публикация, ненужные
+    файлы убирает команда delete_unused_media.
+    """
+    image, image_format = open_image(name, storage)
+    if image_format in REENCODED_FORMATS:
+        params = {'quality': JPEG_QUALITY} if image_format == 'JPEG' else {}
+        name = save_image(image, name, image_format, storage, **params)
+    return name, save_renditions(image, name, storage)
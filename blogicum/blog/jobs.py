@@ -0,0 +1,65 @@
+import logging
+
+from django.utils import timezone
+
+from .cache import bump_version
+from .images import UNREADABLE_IMAGE_ERRORS, process_upload
+from .models import ImageJob, Post
+
+logger = logging.getLogger(__name__)
+
+
+def publish_image(job, **fields):
+    # Пока задание выполнялось, у публикации могло смениться изображение.
+    updated = Post.objects.filter(pk=job.post_id, image=job.image).update(
+        image_ready=True, updated_at=timezone.now(), **fields
+    )
+    if updated:
+        bump_version('posts')
+
+
+def run_image_job(job):
+    """Обрабатывает изображение публикации из задания очереди.
+
+    Возвращает True, если изображение готово. Задание с временной ошибкой
+    возвращается в очередь, пока не исчерпаны попытки.
+    """
+    storage = Post._meta.get_field('image').storage
+    try:
+        name, renditions = process_upload(job.image, storage)
+    except Exception as error:
+        logger.exception('Не удалось обработать изображение %s', job.image)
+        retry = (
+            not isinstance(error, UNREADABLE_IMAGE_ERRORS)
+            and job.attempts < ImageJob.MAX_ATTEMPTS
+        )
+        job.status = (
+            ImageJob.Status.PENDING if retry else ImageJob.Status.FAILED
+        )
+        job.error = str(error)
+        job.save(update_fields=['status', 'error'])
+        if not retry:
+            publish_image(job)
+        return False
+    publish_image(job, image=name, image_renditions=renditions)
+    job.status = ImageJob.Status.DONE
+    job.error = ''
+    job.save(update_fields=['status', 'error'])
+    return True
+
+
+def fail_abandoned_jobs():
+    """Завершает ошибкой задания, брошенные на последней попытке.
+
+    Изображения таких публикаций показываются без уменьшенных копий.
+    """
+    failed = 0
+    for job in ImageJob.objects.abandoned():
+        abandoned = ImageJob.objects.abandoned().filter(pk=job.pk)
+        if abandoned.update(
+            status=ImageJob.Status.FAILED,
+            error='Обработчик не завершил последнюю попытку.',
+        ):
+            publish_image(job)
+            failed += 1
+    return failed
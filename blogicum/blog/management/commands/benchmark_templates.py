@@ -0,0 +1,188 @@
+from datetime import timedelta
+from functools import partial
+from time import perf_counter
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template import Engine, RequestContext, engines
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from blog.models import Category, Post, User, make_excerpt
+from blog.utils import cached_reverse, paginate_posts
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет отрисовку ленты публикаций. Без параметров сравнивает '
+        'ленту с кеширующим загрузчиком шаблонов и без него; --urls, '
+        '--cards и --long-posts выбирают другие замеры.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=100,
+            help='Сколько раз повторить каждый замер.',
+        )
+        parser.add_argument(
+            '--urls',
+            action='store_true',
+            help='Сравнить построение ссылок через reverse() и '
+                 'cached_reverse().',
+        )
+        parser.add_argument(
+            '--cards',
+            action='store_true',
+            help='Замерить отрисовку одной карточки публикации без кеша '
+                 'карточек.',
+        )
+        parser.add_argument(
+            '--long-posts',
+            type=int,
+            default=0,
+            help='Сравнить загрузку ленты из стольких публикаций по 100 КБ '
+                 'с полным текстом и с готовым отрывком. Публикации '
+                 'создаются во временной транзакции.',
+        )
+
+    def handle(self, *args, repeat, urls, cards, long_posts, **options):
+        if long_posts:
+            self.benchmark_long_posts(long_posts, repeat)
+        if urls:
+            self.benchmark_urls(repeat)
+        if cards:
+            self.benchmark_cards(repeat)
+        if not (long_posts or urls or cards):
+            self.benchmark_loaders(repeat)
+
+    def get_feed(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        request.resolver_match = resolve('/')
+        posts = Post.objects.for_cards().published().order_by('-pub_date')
+        # Нулевой таймаут отключает кеш карточек: они отрисовываются
+        # каждый раз.
+        context = {
+            'page_obj': paginate_posts(request, posts),
+            'post_card_timeout': 0,
+        }
+        list(context['page_obj'])
+        return request, context
+
+    def get_engine(self, loaders):
+        default = engines['django'].engine
+        return Engine(
+            dirs=default.dirs,
+            loaders=loaders,
+            context_processors=default.context_processors,
+            libraries=default.libraries,
+        )
+
+    def benchmark_loaders(self, repeat):
+        request, context = self.get_feed()
+        variants = (
+            ('Без кеша шаблонов', LOADERS),
+            (
+                'С кешем шаблонов',
+                [('django.template.loaders.cached.Loader', LOADERS)],
+            ),
+        )
+        for title, loaders in variants:
+            engine = self.get_engine(loaders)
+            engine.get_template('blog/index.html')
+            started = perf_counter()
+            for _ in range(repeat):
+                engine.get_template('blog/index.html').render(
+                    RequestContext(request, context)
+                )
+            elapsed = (perf_counter() - started) / repeat * 1000
+            self.stdout.write(
+                f'{title}: {elapsed:.2f} мс на отрисовку ленты.'
+            )
+
+    def benchmark_urls(self, repeat):
+        for title, url in (
+            ('reverse()', lambda pk: reverse('blog:post_detail', args=(pk,))),
+            ('cached_reverse()', partial(cached_reverse, 'blog:post_detail')),
+        ):
+            started = perf_counter()
+            for pk in range(repeat * 100):
+                url(pk)
+            elapsed = (perf_counter() - started) / repeat / 100 * 1_000_000
+            self.stdout.write(f'{title}: {elapsed:.1f} мкс на ссылку.')
+
+    def benchmark_cards(self, repeat):
+        request, context = self.get_feed()
+        cards = len(context['page_obj'])
+        if not cards:
+            self.stdout.write('Нет опубликованных публикаций для замера.')
+            return
+        engine = self.get_engine(
+            [('django.template.loaders.cached.Loader', LOADERS)]
+        )
+        template = engine.from_string(
+            '{% load blog_tags %}'
+            '{% for post in page_obj %}{% post_card post %}{% endfor %}'
+        )
+        started = perf_counter()
+        for _ in range(repeat):
+            template.render(RequestContext(request, context))
+        elapsed = (perf_counter() - started) / repeat / cards * 1_000_000
+        self.stdout.write(
+            f'Карточка публикации: {elapsed:.0f} мкс на отрисовку.'
+        )
+
+    def benchmark_long_posts(self, count, repeat):
+        text = 'слово ' * (100 * 1024 // len('слово '.encode()))
+        with transaction.atomic():
+            author = User.objects.create(username='benchmark_long_posts')
+            category = Category.objects.create(
+                title='Длинные публикации',
+                description='',
+                slug='benchmark-long-posts',
+            )
+            pub_date = timezone.now() - timedelta(days=1)
+            Post.objects.bulk_create(
+                Post(
+                    title=f'Публикация {i}',
+                    text=text,
+                    excerpt=make_excerpt(text),
+                    author=author,
+                    category=category,
+                    pub_date=pub_date,
+                )
+                for i in range(count)
+            )
+            posts = Post.objects.filter(category=category).order_by('pk')
+            variants = (
+                (
+                    'Полный текст и truncatewords',
+                    posts.select_related('author', 'category', 'location'),
+                    lambda post: Truncator(post.text).words(10, ' …'),
+                ),
+                (
+                    'Готовый отрывок',
+                    posts.for_cards(),
+                    lambda post: post.excerpt,
+                ),
+            )
+            for title, queryset, excerpt in variants:
+                started = perf_counter()
+                for _ in range(repeat):
+                    for post in queryset[:count]:
+                        excerpt(post)
+                elapsed = (perf_counter() - started) / repeat * 1000
+                self.stdout.write(
+                    f'{title}: {elapsed:.2f} мс на {count} карточек.'
+                )
+            transaction.set_rollback(True)
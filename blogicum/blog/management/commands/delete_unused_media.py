@@ -0,0 +1,77 @@
+from datetime import timedelta
+from pathlib import PurePosixPath
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.models import ImageJob, Post
+
+
+def walk(storage, path):
+    dirs, files = storage.listdir(path)
+    for name in files:
+        yield str(PurePosixPath(path, name))
+    for name in dirs:
+        yield from walk(storage, str(PurePosixPath(path, name)))
+
+
+def get_used_names():
+    used = set()
+    posts = Post.objects.exclude(image='').values_list(
+        'image', 'image_renditions'
+    )
+    for image, renditions in posts.iterator(chunk_size=2000):
+        used.add(image)
+        used.update(renditions.values())
+    used.update(
+        ImageJob.objects.filter(
+            status__in=(ImageJob.Status.PENDING, ImageJob.Status.RUNNING)
+        ).values_list('image', flat=True).iterator(chunk_size=2000)
+    )
+    return used
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет файлы изображений, на которые не ссылается ни одна '
+        'публикация.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=60,
+            help=(
+                'Не трогать файлы моложе стольких минут: их публикация '
+                'может быть ещё не сохранена.'
+            ),
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только вывести файлы, которые будут удалены.',
+        )
+
+    def handle(self, *args, min_age, dry_run, **options):
+        field = Post._meta.get_field('image')
+        storage = field.storage
+        if not storage.exists(field.upload_to):
+            self.stdout.write('Удалено файлов: 0.')
+            return
+        used = get_used_names()
+        older_than = timezone.now() - timedelta(minutes=min_age)
+        deleted = 0
+        for name in walk(storage, field.upload_to):
+            if (
+                name in used
+                or storage.get_modified_time(name) > older_than
+            ):
+                continue
+            if dry_run or options['verbosity'] > 1:
+                self.stdout.write(name)
+            if not dry_run:
+                storage.delete(name)
+            deleted += 1
+        verb = 'Будет удалено' if dry_run else 'Удалено'
+        self.stdout.write(f'{verb} файлов: {deleted}.')
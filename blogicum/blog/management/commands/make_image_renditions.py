@@ -0,0 +1,71 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.cache import bump_version
+from blog.images import make_renditions
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт уменьшенные WebP-копии изображений публикаций, '
+        'у которых их ещё нет.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Сколько процессов обрабатывают изображения.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Сколько публикаций обновлять одним запросом.',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать копии и для уже обработанных изображений.',
+        )
+
+    def handle(self, *args, workers, batch_size, **options):
+        posts = Post.objects.exclude(image='').order_by('pk')
+        if not options['all']:
+            posts = posts.filter(image_renditions={})
+        processed = failed = 0
+        last_pk = 0
+        with ProcessPoolExecutor(workers, initializer=django.setup) as pool:
+            while True:
+                batch = list(
+                    posts.filter(pk__gt=last_pk).only('pk', 'image')[
+                        :batch_size
+                    ]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                names = [post.image.name for post in batch]
+                now = timezone.now()
+                for post, renditions in zip(
+                    batch, pool.map(make_renditions, names)
+                ):
+                    post.image_renditions = renditions
+                    # bulk_update() не вызывает pre_save(), а ETag и
+                    # Last-Modified страниц зависят от updated_at.
+                    post.updated_at = now
+                    processed += 1
+                    failed += not renditions
+                Post.objects.bulk_update(
+                    batch, ['image_renditions', 'updated_at']
+                )
+                bump_version('posts')
+        self.stdout.write(
+            f'Обработано изображений: {processed}. Не прочитано: {failed}.'
+        )
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.jobs import fail_abandoned_jobs, run_image_job
+from blog.models import ImageJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Обрабатывает очередь загруженных изображений: убирает EXIF, '
+        'перекодирует и создаёт уменьшенные копии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать накопившиеся задания и завершиться.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Сколько секунд ждать новых заданий, если очередь пуста.',
+        )
+
+    def handle(self, *args, once, poll_interval, **options):
+        done = failed = 0
+        try:
+            while True:
+                job = ImageJob.objects.claim()
+                if job is None:
+                    failed += fail_abandoned_jobs()
+                    if once:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                if run_image_job(job):
+                    done += 1
+                else:
+                    failed += 1
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        f'{job.image}: {job.get_status_display()}'
+                    )
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(
+            f'Обработано изображений: {done}. С ошибками: {failed}.'
+        )
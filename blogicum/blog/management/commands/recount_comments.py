@@ -0,0 +1,98 @@
+from argparse import ArgumentTypeError
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from blog.models import Comment, Post
+
+
+def moment(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ArgumentTypeError(
+            'Ожидается дата и время в формате ISO 8601.'
+        )
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики комментариев у публикаций.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10_000,
+            help='Сколько публикаций обрабатывать одним запросом.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, ничего не меняя.',
+        )
+        parser.add_argument(
+            '--since',
+            type=moment,
+            help='Проверить только публикации, которые или комментарии '
+                 'к которым изменились начиная с этого момента. Удаление '
+                 'комментария через ORM тоже отмечает публикацию '
+                 'изменённой; удаления в обход ORM (SQL, триггеры других '
+                 'таблиц) так не находятся.',
+        )
+
+    def handle(self, *args, batch_size, dry_run, since, **options):
+        actual_count = Coalesce(
+            Subquery(
+                Comment.objects.filter(
+                    post=OuterRef('pk'),
+                ).order_by().values('post').annotate(
+                    total=Count('pk'),
+                ).values('total')
+            ),
+            0,
+        )
+        posts = Post.objects.all()
+        if since is not None:
+            posts = posts.filter(
+                Q(pk__in=Post.objects.changed_since(since).values('pk'))
+                | Q(pk__in=Comment.objects.changed_since(since).values('post'))
+            )
+        checked = drifted = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                posts.filter(pk__gt=last_pk).order_by(
+                    'pk'
+                ).values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            last_pk = pks[-1]
+            checked += len(pks)
+            batch = Post.objects.filter(
+                pk__in=pks,
+            ).exclude(comment_count=actual_count)
+            if dry_run:
+                drift = batch.annotate(actual=actual_count).values_list(
+                    'pk', 'comment_count', 'actual',
+                )
+                for pk, stored, actual in drift:
+                    drifted += 1
+                    if options['verbosity'] > 1:
+                        self.stdout.write(
+                            f'Публикация {pk}: в счётчике {stored}, '
+                            f'комментариев {actual}'
+                        )
+            else:
+                with transaction.atomic():
+                    drifted += batch.update(comment_count=actual_count)
+        action = 'Расходится' if dry_run else 'Исправлено'
+        self.stdout.write(
+            f'Проверено публикаций: {checked}. {action}: {drifted}.'
+        )
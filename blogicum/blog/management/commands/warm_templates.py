@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+
+
+def get_template_names(engine):
+    names = set()
+    for loader in engine.template_loaders:
+        for directory in loader.get_dirs():
+            directory = Path(directory)
+            names.update(
+                path.relative_to(directory).as_posix()
+                for path in directory.rglob('*')
+                if path.is_file()
+            )
+    return sorted(names)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает и компилирует все шаблоны, чтобы кеширующий загрузчик '
+        'не обращался к диску при первых запросах.'
+    )
+
+    def handle(self, *args, **options):
+        compiled = 0
+        errors = []
+        for backend in engines.all():
+            if not isinstance(backend, DjangoTemplates):
+                continue
+            for name in get_template_names(backend.engine):
+                try:
+                    backend.engine.get_template(name)
+                except TemplateSyntaxError as error:
+                    errors.append(f'{name}: {error}')
+                else:
+                    compiled += 1
+        if errors:
+            raise CommandError(
+                'Ошибки в шаблонах:\n' + '\n'.join(errors)
+            )
+        if options['verbosity'] > 0:
+            self.stdout.write(f'Скомпилировано шаблонов: {compiled}.')
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:49
+
+import core.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0020_alter_post_location'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='comment_count',
+            field=models.IntegerField(default=0, verbose_name='Cчётчик комментариев'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=core.indexes.PartialIndex(condition=models.Q(('is_published', True)), fields=['-pub_date'], name='post_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=core.indexes.PartialIndex(condition=models.Q(('is_published', True)), fields=['category', '-pub_date'], name='post_category_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date'], name='post_author_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,124 @@
+from django.db import migrations
+
+RECOUNT = (
+    'UPDATE blog_post SET comment_count = ('
+    'SELECT COUNT(*) FROM blog_comment '
+    'WHERE blog_comment.post_id = blog_post.id)'
+)
+
+ROW_TRIGGERS = (
+    'CREATE TRIGGER blog_comment_count_insert '
+    'AFTER INSERT ON blog_comment FOR EACH ROW '
+    '{begin}UPDATE blog_post SET comment_count = comment_count + 1 '
+    'WHERE id = NEW.post_id;{end}',
+    'CREATE TRIGGER blog_comment_count_delete '
+    'AFTER DELETE ON blog_comment FOR EACH ROW '
+    '{begin}UPDATE blog_post SET comment_count = comment_count - 1 '
+    'WHERE id = OLD.post_id;{end}',
+    'CREATE TRIGGER blog_comment_count_move '
+    'AFTER UPDATE ON blog_comment FOR EACH ROW '
+    '{begin}UPDATE blog_post SET comment_count = comment_count + CASE '
+    'WHEN id = NEW.post_id THEN 1 ELSE -1 END '
+    'WHERE id IN (OLD.post_id, NEW.post_id) '
+    'AND OLD.post_id <> NEW.post_id;{end}',
+)
+
+# PostgreSQL fires one statement-level trigger per INSERT/UPDATE/DELETE
+# and applies a single aggregated UPDATE per affected post.
+POSTGRESQL_FUNCTION = '''
+    CREATE FUNCTION {name}() RETURNS trigger AS $$
+    BEGIN
+        UPDATE blog_post SET comment_count = comment_count + c.delta
+        FROM ({changes}) c
+        WHERE blog_post.id = c.post_id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+'''
+
+POSTGRESQL_CHANGES = {
+    'blog_comment_count_insert': (
+        'REFERENCING NEW TABLE AS new_comments',
+        'INSERT',
+        'SELECT post_id, COUNT(*) AS delta '
+        'FROM new_comments GROUP BY post_id',
+    ),
+    'blog_comment_count_delete': (
+        'REFERENCING OLD TABLE AS old_comments',
+        'DELETE',
+        'SELECT post_id, -COUNT(*) AS delta '
+        'FROM old_comments GROUP BY post_id',
+    ),
+    'blog_comment_count_move': (
+        'REFERENCING OLD TABLE AS old_comments NEW TABLE AS new_comments',
+        'UPDATE',
+        'SELECT post_id, SUM(delta) AS delta FROM ('
+        'SELECT o.post_id, -1 AS delta FROM old_comments o '
+        'JOIN new_comments n ON n.id = o.id WHERE o.post_id <> n.post_id '
+        'UNION ALL '
+        'SELECT n.post_id, 1 AS delta FROM old_comments o '
+        'JOIN new_comments n ON n.id = o.id WHERE o.post_id <> n.post_id'
+        ') moved GROUP BY post_id',
+    ),
+}
+
+POSTGRESQL_TRIGGERS = [
+    sql
+    for name, (transition, event, changes) in POSTGRESQL_CHANGES.items()
+    for sql in (
+        POSTGRESQL_FUNCTION.format(name=name, changes=changes),
+        f'CREATE TRIGGER {name} AFTER {event} ON blog_comment '
+        f'{transition} FOR EACH STATEMENT EXECUTE PROCEDURE {name}()',
+    )
+]
+
+TRIGGER_NAMES = (
+    'blog_comment_count_insert',
+    'blog_comment_count_delete',
+    'blog_comment_count_move',
+)
+
+
+def get_trigger_sql(vendor):
+    if vendor == 'postgresql':
+        return POSTGRESQL_TRIGGERS
+    if vendor == 'sqlite':
+        return [
+            sql.format(begin='BEGIN ', end=' END') for sql in ROW_TRIGGERS
+        ]
+    if vendor == 'mysql':
+        return [
+            sql.format(begin='', end='').rstrip(';') for sql in ROW_TRIGGERS
+        ]
+    return ()
+
+
+def install_triggers(apps, schema_editor):
+    for sql in get_trigger_sql(schema_editor.connection.vendor):
+        schema_editor.execute(sql)
+    schema_editor.execute(RECOUNT)
+
+
+def remove_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if not get_trigger_sql(vendor):
+        return
+    for name in TRIGGER_NAMES:
+        if vendor == 'postgresql':
+            schema_editor.execute(
+                f'DROP TRIGGER IF EXISTS {name} ON blog_comment'
+            )
+            schema_editor.execute(f'DROP FUNCTION IF EXISTS {name}()')
+        else:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0022_comment_thread_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_triggers, remove_triggers),
+    ]
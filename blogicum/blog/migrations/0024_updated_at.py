@@ -0,0 +1,45 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:09
+
+import core.fields
+import django.utils.timezone
+from django.db import migrations
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Rows created before updated_at existed got the migration time.
+    for model_name in ('Category', 'Location', 'Post', 'Comment'):
+        apps.get_model('blog', model_name).objects.update(
+            updated_at=F('created_at')
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0023_comment_count_triggers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=core.fields.AutoLastModifiedField(db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='Изменено'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='updated_at',
+            field=core.fields.AutoLastModifiedField(db_index=True, default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='updated_at',
+            field=core.fields.AutoLastModifiedField(db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='Изменено'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=core.fields.AutoLastModifiedField(db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='Изменено'),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:14
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 1000
+
+
+def backfill_excerpts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    last_pk = 0
+    while True:
+        batch = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk').only(
+                'pk', 'text'
+            )[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for post in batch:
+            post.excerpt = Truncator(post.text).words(10, truncate=' …')
+        Post.objects.bulk_update(batch, ['excerpt'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0024_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Отрывок'),
+        ),
+        migrations.RunPython(backfill_excerpts, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,24 @@
-from core.models import BaseModel
+from datetime import timedelta
+
+from core.fields import AutoLastModifiedField
+from core.indexes import PartialIndex
+from core.models import BaseModel, BaseQuerySet
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from .cache import bump_version
 
 User = get_user_model()
 
+EXCERPT_WORDS = 10
+
+
+def make_excerpt(text):
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
 
 class Category(BaseModel):
     title = models.CharField('Заголовок', max_length=256)
@@ -35,7 +49,47 @@ class Location(BaseModel):
         return self.name
 
 
+class PostQuerySet(BaseQuerySet):
+
+    @staticmethod
+    def _published_filter():
+        return models.Q(
+            is_published=True,
+            category__is_published=True,
+            pub_date__lt=timezone.now(),
+        )
+
+    def published(self):
+        return self.filter(self._published_filter())
+
+    def next_publication(self):
+        return self.filter(
+            is_published=True,
+            category__is_published=True,
+            pub_date__gt=timezone.now(),
+        ).aggregate(next=models.Min('pub_date'))['next']
+
+    def visible_to(self, user):
+        if not user.is_authenticated:
+            return self.published()
+        return self.filter(
+            models.Q(author=user) | self._published_filter()
+        )
+
+    def for_cards(self):
+        return self.select_related(
+            'author',
+            'category',
+            'location',
+        ).defer(
+            'text',
+            'category__description',
+        )
+
+
 class Post(BaseModel):
+    WORKER_FIELDS = ('image', 'image_ready', 'image_renditions')
+
     title = models.CharField('Название', max_length=256)
     text = models.TextField('Текст')
     pub_date = models.DateTimeField(
@@ -66,11 +120,41 @@ class Post(BaseModel):
         upload_to='post_images',
         blank=True
     )
+    image_ready = models.BooleanField(
+        'Изображение обработано',
+        default=True,
+        editable=False,
+    )
+    image_renditions = models.JSONField(
+        'Копии изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
+    excerpt = models.TextField('Отрывок', blank=True, editable=False)
     comment_count = models.IntegerField('Cчётчик комментариев', default=0)
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
+        indexes = (
+            PartialIndex(
+                fields=('-pub_date',),
+                name='post_feed_idx',
+                condition=models.Q(is_published=True),
+            ),
+            PartialIndex(
+                fields=('category', '-pub_date'),
+                name='post_category_feed_idx',
+                condition=models.Q(is_published=True),
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_author_feed_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title
@@ -78,6 +162,53 @@ class Post(BaseModel):
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'pk': self.pk})
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt = make_excerpt(self.text)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        new_image = bool(self.image) and not self.image._committed
+        image_changed = new_image or not self.image
+        if image_changed:
+            self.image_ready = not new_image
+            self.image_renditions = {}
+        # comment_count ведут триггеры базы данных, а поля изображения —
+        # обработчик очереди, поэтому сохранение устаревшего объекта не
+        # должно их перезаписывать.
+        if not (
+            self._state.adding
+            or self.pk is None
+            or kwargs.get('force_insert')
+            or kwargs.get('update_fields') is not None
+        ):
+            skipped = {'comment_count'}
+            if not image_changed:
+                skipped.update(self.WORKER_FIELDS)
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in skipped
+            ]
+        super().save(*args, **kwargs)
+        if new_image:
+            ImageJob.objects.create(post=self, image=self.image.name)
+
+
+class CommentQuerySet(BaseQuerySet):
+
+    def delete(self):
+        # У Comment нет сигналов удаления, чтобы каскадное удаление
+        # оставалось одним запросом; кеш сбрасывается один раз.
+        # Публикации отмечаются изменёнными, чтобы recount_comments --since
+        # видел удалённые комментарии.
+        with transaction.atomic(using=self.db):
+            Post.objects.using(self.db).filter(
+                pk__in=self.values('post_id')
+            ).update(updated_at=timezone.now())
+            deleted = super().delete()
+        bump_version('comments')
+        return deleted
+
 
 class Comment(models.Model):
     text = models.TextField('Комментарий')
@@ -87,15 +218,116 @@ class Comment(models.Model):
         related_name='comment',
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = AutoLastModifiedField(db_index=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
     )
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_thread_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            Post.objects.filter(pk=self.post_id).update(
+                updated_at=timezone.now()
+            )
+            deleted = super().delete(*args, **kwargs)
+        bump_version('comments')
+        return deleted
+
+
+IMAGE_JOB_LEASE = timedelta(minutes=10)
+
+
+class ImageJobQuerySet(models.QuerySet):
+
+    def claimable(self, lease=IMAGE_JOB_LEASE):
+        return self.filter(
+            models.Q(status=ImageJob.Status.PENDING)
+            | models.Q(
+                status=ImageJob.Status.RUNNING,
+                started_at__lt=timezone.now() - lease,
+            ),
+            attempts__lt=ImageJob.MAX_ATTEMPTS,
+        )
+
+    def abandoned(self, lease=IMAGE_JOB_LEASE):
+        """Задания, обработчик которых пропал на последней попытке."""
+        return self.filter(
+            status=ImageJob.Status.RUNNING,
+            started_at__lt=timezone.now() - lease,
+            attempts__gte=ImageJob.MAX_ATTEMPTS,
+        )
+
+    def claim(self):
+        """Забирает старейшее задание в работу условным UPDATE.
+
+        Задание достаётся ровно одному обработчику, даже если несколько
+        обработчиков выбрали его одновременно.
+        """
+        candidates = self.claimable().order_by('pk').values_list(
+            'pk', flat=True
+        )
+        for pk in candidates[:10]:
+            claimed = self.claimable().filter(pk=pk).update(
+                status=ImageJob.Status.RUNNING,
+                started_at=timezone.now(),
+                attempts=models.F('attempts') + 1,
+            )
+            if claimed:
+                return self.select_related('post').get(pk=pk)
+        return None
+
+
+class ImageJob(models.Model):
+    MAX_ATTEMPTS = 3
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Готово'
+        FAILED = 'failed', 'Ошибка'
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Публикация',
+    )
+    image = models.CharField('Файл изображения', max_length=255)
+    status = models.CharField(
+        'Состояние',
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    started_at = models.DateTimeField('Начато', null=True, blank=True)
+    error = models.TextField('Ошибка', blank=True)
+
+    objects = ImageJobQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'обработка изображения'
+        verbose_name_plural = 'Обработка изображений'
+        indexes = (
+            models.Index(fields=('status', 'id'), name='image_job_queue_idx'),
+        )
+
+    def __str__(self):
+        return self.image
@@ -0,0 +1,46 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_version
+from .models import Category, Comment, Location, Post, User
+
+CACHE_TAGS = {
+    Post: 'posts',
+    Category: 'categories',
+    Location: 'locations',
+    Comment: 'comments',
+    User: 'users',
+}
+
+# Комментарии удаляются каскадом без сигналов (см. CommentQuerySet),
+# поэтому их тег сбрасывается при удалении публикации или автора.
+CASCADE_TAGS = {
+    Post: ('comments',),
+    User: ('comments',),
+}
+
+
+def invalidate_cache_tags(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    bump_version(CACHE_TAGS[sender])
+
+
+def invalidate_deleted_tags(sender, **kwargs):
+    bump_version(CACHE_TAGS[sender], *CASCADE_TAGS.get(sender, ()))
+
+
+@receiver(pre_delete, sender=User)
+def touch_commented_posts(sender, instance, **kwargs):
+    # Комментарии автора удалятся каскадом без сигналов; публикации, где
+    # они были, отмечаются изменёнными для recount_comments --since.
+    Post.objects.filter(comment__author=instance).update(
+        updated_at=timezone.now()
+    )
+
+
+for model in CACHE_TAGS:
+    post_save.connect(invalidate_cache_tags, sender=model)
+    if model is not Comment:
+        post_delete.connect(invalidate_deleted_tags, sender=model)
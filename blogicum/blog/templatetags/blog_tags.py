@@ -0,0 +1,74 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+from ..cache import get_post_card_key
+from ..utils import cached_reverse
+
+register = template.Library()
+
+POST_CARD_TEMPLATE = 'includes/post_card.html'
+
+
+def get_post_card_template(context):
+    """Шаблон карточки, скомпилированный один раз за отрисовку.
+
+    Как и {% include %}, держит шаблон в render_context: без кеширующего
+    загрузчика get_template() читал бы файл заново для каждой карточки.
+    """
+    render_context = context.render_context.dicts[0]
+    if POST_CARD_TEMPLATE not in render_context:
+        render_context[POST_CARD_TEMPLATE] = (
+            context.template.engine.get_template(POST_CARD_TEMPLATE)
+        )
+    return render_context[POST_CARD_TEMPLATE]
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post, detail=False):
+    """Карточка публикации для лент и страницы публикации.
+
+    Карточка отрисовывается одним шаблоном в одном новом слое контекста,
+    ссылки строятся здесь же. Карточки лент кешируются, если
+    post_card_timeout не равен нулю.
+    """
+    key = None
+    timeout = context.get(
+        'post_card_timeout', settings.POST_CARD_CACHE_TIMEOUT
+    )
+    if not detail and timeout != 0:
+        key = get_post_card_key(post)
+        html = cache.get(key)
+        if html is not None:
+            return mark_safe(html)
+    card = get_post_card_template(context)
+    post_url = cached_reverse('blog:post_detail', post.pk)
+    html = card.render(context.new({
+        'post': post,
+        'detail': detail,
+        'post_url': post_url,
+        'author_url': cached_reverse('blog:profile', post.author.username),
+        'category_url': post.category and cached_reverse(
+            'blog:category_posts', post.category.slug
+        ),
+    }))
+    if key is not None:
+        cache.set(key, html, timeout)
+    return html
+
+
+@register.simple_tag
+def cached_url(viewname, *args):
+    return cached_reverse(viewname, *args)
+
+
+@register.simple_tag
+def image_srcset(post):
+    storage = post.image.storage
+    return ', '.join(
+        f'{storage.url(name)} {width}w'
+        for width, name in sorted(
+            post.image_renditions.items(), key=lambda item: int(item[0])
+        )
+    )
@@ -0,0 +1,83 @@
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+# Триггеры создаёт миграция 0023; здесь только то, что нужно, чтобы
+# проверять их наличие и восстанавливать их на SQLite.
+TRIGGERS_MIGRATION = ('blog', '0023_comment_count_triggers')
+
+TRIGGER_NAMES = (
+    'blog_comment_count_insert',
+    'blog_comment_count_delete',
+    'blog_comment_count_move',
+)
+
+INSTALLED_TRIGGERS_SQL = {
+    'sqlite': "SELECT name FROM sqlite_master WHERE type = 'trigger'",
+    'postgresql': 'SELECT tgname FROM pg_trigger WHERE NOT tgisinternal',
+    'mysql': (
+        'SELECT trigger_name FROM information_schema.triggers '
+        'WHERE trigger_schema = DATABASE()'
+    ),
+}
+
+SQLITE_TRIGGERS = (
+    'CREATE TRIGGER blog_comment_count_insert '
+    'AFTER INSERT ON blog_comment FOR EACH ROW '
+    'BEGIN UPDATE blog_post SET comment_count = comment_count + 1 '
+    'WHERE id = NEW.post_id; END',
+    'CREATE TRIGGER blog_comment_count_delete '
+    'AFTER DELETE ON blog_comment FOR EACH ROW '
+    'BEGIN UPDATE blog_post SET comment_count = comment_count - 1 '
+    'WHERE id = OLD.post_id; END',
+    'CREATE TRIGGER blog_comment_count_move '
+    'AFTER UPDATE ON blog_comment FOR EACH ROW '
+    'BEGIN UPDATE blog_post SET comment_count = comment_count + CASE '
+    'WHEN id = NEW.post_id THEN 1 ELSE -1 END '
+    'WHERE id IN (OLD.post_id, NEW.post_id) '
+    'AND OLD.post_id <> NEW.post_id; END',
+)
+
+RECOUNT = (
+    'UPDATE blog_post SET comment_count = ('
+    'SELECT COUNT(*) FROM blog_comment '
+    'WHERE blog_comment.post_id = blog_post.id)'
+)
+
+
+def get_missing_triggers(connection):
+    """Триггеры счётчика комментариев, которых нет в базе данных."""
+    sql = INSTALLED_TRIGGERS_SQL.get(connection.vendor)
+    if sql is None:
+        return set()
+    recorder = MigrationRecorder(connection)
+    if TRIGGERS_MIGRATION not in recorder.applied_migrations():
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        installed = {name for name, in cursor.fetchall()}
+    return set(TRIGGER_NAMES) - installed
+
+
+# SQLite пересоздаёт таблицу при ALTER TABLE и теряет её триггеры, а
+# пересоздание blog_post может упасть, пока триггеры на него ссылаются.
+# Поэтому на SQLite триггеры снимаются перед миграциями и ставятся заново
+# после них, и самим миграциям не нужно о них заботиться.
+def drop_sqlite_triggers(sender, using, plan=None, **kwargs):
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not plan:
+        return
+    with connection.cursor() as cursor:
+        for name in TRIGGER_NAMES:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+def restore_sqlite_triggers(sender, using, **kwargs):
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not get_missing_triggers(connection):
+        return
+    with connection.cursor() as cursor:
+        for name in TRIGGER_NAMES:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        for sql in SQLITE_TRIGGERS:
+            cursor.execute(sql)
+        cursor.execute(RECOUNT)
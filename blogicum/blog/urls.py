@@ -18,6 +18,9 @@ urlpatterns = [
     path('profile/<username>/', views.Profile.as_view(), name='profile'),
     path('edit_profile/', views.EditProfile.as_view(), name='edit_profile'),
     path('posts/<int:pk>/comment/', views.add_comment, name='add_comment'),
+    path('posts/<int:pk>/comments/',
+         views.post_comments,
+         name='post_comments'),
     path('posts/<int:pk>/edit_comment/<int:pk2>/',
          views.EditComment.as_view(),
          name='edit_comment'),
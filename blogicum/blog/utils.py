@@ -1,7 +1,248 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import json
+from urllib.parse import quote
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from django.utils.http import RFC3986_SUBDELIMS
 
-def paginate(model, page_number):
-    paginator = Paginator(model, 10)
+from .cache import get_version, timeout_until
+
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 50
+PAGE_RANGE_ON_EACH_SIDE = 2
+PAGE_RANGE_ON_ENDS = 1
+URL_ARG_SENTINEL = 9_000_000_000
+
+_url_templates = {}
+
+
+class WindowedPage(Page):
+
+    @property
+    def page_range(self):
+        return self.paginator.get_elided_page_range(
+            self.number,
+            on_each_side=PAGE_RANGE_ON_EACH_SIDE,
+            on_ends=PAGE_RANGE_ON_ENDS,
+        )
+
+
+class PostsPaginator(Paginator):
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+
+class CachedCountPaginator(PostsPaginator):
+    """Пагинатор, кеширующий COUNT(*) до следующего изменения публикаций.
+
+    Если задан expires_at (момент или функция, возвращающая его), значение
+    не хранится дольше этого момента: так отложенная публикация попадает
+    в счётчик сразу после выхода.
+    """
+
+    def __init__(self, object_list, per_page, count_key, expires_at=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.expires_at = expires_at
+
+    @cached_property
+    def count(self):
+        version = get_version('posts', 'categories')
+        key = f'paginator_count:{version}:{self.count_key}'
+        count = cache.get(key)
+        if count is None:
+            count = self.estimate_count()
+            if count is None:
+                count = super().count
+            expires_at = self.expires_at
+            if callable(expires_at):
+                expires_at = expires_at()
+            cache.set(
+                key,
+                count,
+                timeout_until(
+                    getattr(settings, 'PAGINATOR_COUNT_CACHE_TIMEOUT', 60),
+                    expires_at,
+                ),
+            )
+        return count
+
+    def estimate_count(self):
+        threshold = getattr(
+            settings, 'PAGINATOR_COUNT_ESTIMATE_THRESHOLD', None
+        )
+        query = getattr(self.object_list, 'query', None)
+        if threshold is None or query is None:
+            return None
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        rows = int(plan[0]['Plan']['Plan Rows'])
+        return rows if rows >= threshold else None
+
+
+def paginate(model, page_number, count_key=None, expires_at=None):
+    if count_key is None:
+        paginator = PostsPaginator(model, POSTS_PER_PAGE)
+    else:
+        paginator = CachedCountPaginator(
+            model, POSTS_PER_PAGE, count_key, expires_at
+        )
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def encode_cursor(obj, field):
+    raw = f'{getattr(obj, field).isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        value, pk = base64.urlsafe_b64decode(padded).decode().split('|')
+        moment = parse_datetime(value)
+        if moment is None:
+            return None
+        return moment, int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+class CursorPage:
+    """Страница, полученная по курсору без COUNT(*) и OFFSET."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, field, has_next, has_previous):
+        self.object_list = object_list
+        self.field = field
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(self.object_list[-1], self.field)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(self.object_list[0], self.field)
+        return None
+
+
+def paginate_by_cursor(queryset, after=None, before=None, field='pub_date',
+                       descending=True, per_page=POSTS_PER_PAGE):
+    cursor = decode_cursor(before)
+    forward = cursor is None
+    if forward:
+        cursor = decode_cursor(after)
+    if descending == forward:
+        lookup, ordering = 'lt', (f'-{field}', '-pk')
+    else:
+        lookup, ordering = 'gt', (field, 'pk')
+    if cursor is not None:
+        value, pk = cursor
+        queryset = queryset.filter(
+            Q(**{f'{field}__{lookup}': value})
+            | Q(**{field: value, f'pk__{lookup}': pk})
+        )
+    rows = list(queryset.order_by(*ordering)[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if forward:
+        return CursorPage(rows, field, has_more, cursor is not None)
+    rows.reverse()
+    return CursorPage(rows, field, True, has_more)
+
+
+def paginate_posts(request, posts, count_key=None, expires_at=None):
+    view_name = request.resolver_match.view_name
+    modes = getattr(settings, 'PAGINATION_MODES', {})
+    if modes.get(view_name, 'offset') == 'cursor':
+        return paginate_by_cursor(
+            posts,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    return paginate(posts, request.GET.get('page'), count_key, expires_at)
+
+
+def paginate_comments(post, after=None):
+    return paginate_by_cursor(
+        post.comment.select_related('author'),
+        after=after,
+        field='created_at',
+        descending=False,
+        per_page=COMMENTS_PER_PAGE,
+    )
+
+
+def get_url_template(viewname, n_args):
+    key = (get_urlconf(), get_script_prefix(), viewname, n_args)
+    if key not in _url_templates:
+        sentinels = [str(URL_ARG_SENTINEL + i) for i in range(n_args)]
+        rest = reverse(viewname, args=sentinels)
+        parts = []
+        for sentinel in sentinels:
+            head, found, rest = rest.partition(sentinel)
+            if not found or sentinel in rest:
+                parts = None
+                break
+            parts.append(head)
+        _url_templates[key] = parts and (*parts, rest)
+    return _url_templates[key]
+
+
+def cached_reverse(viewname, *args):
+    """reverse() с позиционными аргументами без обхода URLconf.
+
+    Для маршрута один раз строится шаблон URL с метками на месте
+    аргументов, дальше ссылки собираются склейкой строк.
+    """
+    parts = get_url_template(viewname, len(args))
+    if parts is None:
+        return reverse(viewname, args=args)
+    url = [parts[0]]
+    for arg, part in zip(args, parts[1:]):
+        url.append(quote(str(arg), safe=RFC3986_SUBDELIMS + '/~:@'))
+        url.append(part)
+    return ''.join(url)
@@ -1,16 +1,17 @@
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import PermissionDenied
-from django.db.models import Q
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
-from django.utils import timezone
+from django.utils.functional import cached_property
 from django.views.generic import (CreateView, DeleteView, DetailView, ListView,
                                   UpdateView)
 
+from .cache import (ConditionalGetMixin, PostPageCacheMixin,
+                    get_next_publication, get_validators)
 from .forms import CommentForm, CreateOrEditPostForm
 from .models import Category, Comment, Post, User
-from .utils import paginate
+from .utils import paginate_comments, paginate_posts
 
 
 @login_required
@@ -22,11 +23,18 @@ def add_comment(request, pk):
         comment.author = request.user
         comment.post = post
         comment.save()
-        post.comment_count += 1
-        post.save()
     return redirect('blog:post_detail', pk=pk)
 
 
+def post_comments(request, pk):
+    post = get_object_or_404(Post.objects.visible_to(request.user), pk=pk)
+    context = {
+        'post': post,
+        'comments': paginate_comments(post, request.GET.get('after')),
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
 class EditComment(LoginRequiredMixin, UpdateView):
 
     def get(self, request, pk, pk2):
@@ -66,30 +74,36 @@ class DeleteComment(LoginRequiredMixin, DeleteView):
         return render(request, 'blog/comment.html', {'comment': comment})
 
     def post(self, request, pk, pk2):
-        post = get_object_or_404(Post, pk=pk)
-        comment = Comment.objects.get(post_id=pk, id=pk2)
+        comment = get_object_or_404(Comment, post_id=pk, id=pk2)
         if comment.author != request.user:
             raise PermissionDenied
         comment.delete()
-        post.comment_count -= 1
-        post.save()
         return redirect('blog:post_detail', pk=pk)
 
 
-class Index(ListView):
+class Index(PostPageCacheMixin, ConditionalGetMixin, ListView):
     model = Post
     template_name = 'blog/index.html'
 
+    def get_next_publication(self):
+        return get_next_publication('index', Post.objects.all())
+
+    @cached_property
+    def page_obj(self):
+        posts = Post.objects.for_cards().published().order_by('-pub_date')
+        return paginate_posts(
+            self.request,
+            posts,
+            count_key='index',
+            expires_at=self.get_next_publication,
+        )
+
+    def get_validators(self):
+        return get_validators(self.request, self.page_obj)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        posts = Post.objects.all(
-        ).filter(
-            pub_date__lt=(timezone.now()),
-            is_published=True,
-            category__is_published=True
-        ).order_by('-pub_date')
-        page_number = self.request.GET.get('page')
-        context['page_obj'] = paginate(posts, page_number)
+        context['page_obj'] = self.page_obj
         return context
 
 
@@ -139,92 +153,126 @@ class DeletePost(LoginRequiredMixin, DeleteView):
         return super().dispatch(request, *args, **kwargs)
 
 
-class PostDetail(DetailView):
+class PostDetail(PostPageCacheMixin, ConditionalGetMixin, DetailView):
     model = Post
     template_name = 'blog/detail.html'
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        if self.request.user.is_authenticated:
-            return queryset.filter(
-                Q(author=self.request.user)
-                | Q(
-                    is_published=True,
-                    category__is_published=True,
-                    pub_date__lt=(timezone.now())
-                )
-            )
-        return queryset.filter(
-            Q(is_published=True),
-            Q(category__is_published=True),
-            Q(pub_date__lt=(timezone.now()))
+        return super().get_queryset().select_related(
+            'author',
+            'category',
+            'location',
+        ).visible_to(self.request.user)
+
+    def get_object(self, queryset=None):
+        if queryset is None and hasattr(self, 'object'):
+            return self.object
+        return super().get_object(queryset)
+
+    @cached_property
+    def comments(self):
+        return paginate_comments(
+            self.object, self.request.GET.get('comments_after')
+        )
+
+    def get_validators(self):
+        self.object = self.get_object()
+        return get_validators(
+            self.request,
+            [self.object],
+            self.comments.has_next(),
+            *self.comments,
+            *(comment.author for comment in self.comments),
         )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        pk = self.kwargs.get('pk')
-        post = Post.objects.get(pk=pk)
-        context['post'] = post
         context['form'] = CommentForm()
-        context['comments'] = (
-            self.object.comment.select_related('author')
-        )
+        context['comments'] = self.comments
         return context
 
 
-class CategoryPosts(ListView):
+class CategoryPosts(PostPageCacheMixin, ConditionalGetMixin, ListView):
     model = Post, Category
     template_name = 'blog/category.html'
 
     def get_queryset(self):
         category_slug = self.kwargs['category_slug']
-        return Post.objects.filter(
+        return Post.objects.published().filter(
             category__slug=category_slug,
+        )
+
+    def get_next_publication(self):
+        category_slug = self.kwargs['category_slug']
+        return get_next_publication(
+            f'category:{category_slug}',
+            Post.objects.filter(category__slug=category_slug),
+        )
+
+    @cached_property
+    def category(self):
+        return get_object_or_404(
+            Category,
+            slug=self.kwargs['category_slug'],
             is_published=True,
-            pub_date__lt=(timezone.now())
         )
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+    @cached_property
+    def page_obj(self):
         category_slug = self.kwargs['category_slug']
-        posts = Post.objects.all().filter(
+        posts = Post.objects.for_cards().published().filter(
             category__slug=category_slug,
-            pub_date__lt=(timezone.now()),
-            is_published=True,
-            category__is_published=True,
         ).order_by('-pub_date')
-        page_number = self.request.GET.get('page')
-        context['page_obj'] = paginate(posts, page_number)
-        context['category'] = get_object_or_404(
-            Category,
-            slug=category_slug,
-            is_published=True,
+        return paginate_posts(
+            self.request,
+            posts,
+            count_key=f'category:{category_slug}',
+            expires_at=self.get_next_publication,
         )
+
+    def get_validators(self):
+        return get_validators(self.request, self.page_obj, self.category)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page_obj'] = self.page_obj
+        context['category'] = self.category
         return context
 
 
-class Profile(DetailView):
+class Profile(ConditionalGetMixin, DetailView):
     model = User
     template_name = 'blog/profile.html'
     context_object_name = 'profile'
 
     def get_object(self, queryset=None):
-        username = self.kwargs.get('username')
-        return get_object_or_404(User, username=username)
+        if not hasattr(self, 'object'):
+            username = self.kwargs.get('username')
+            self.object = get_object_or_404(User, username=username)
+        return self.object
+
+    @cached_property
+    def page_obj(self):
+        profile = self.get_object()
+        posts = Post.objects.for_cards().filter(
+            author=profile,
+        ).visible_to(self.request.user).order_by('-pub_date')
+        is_author = self.request.user == profile
+        return paginate_posts(
+            self.request,
+            posts,
+            count_key=f'profile:{profile.pk}:{is_author}',
+        )
+
+    def get_validators(self):
+        profile = self.get_object()
+        return get_validators(
+            self.request, self.page_obj, profile, profile.date_joined
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        username = self.kwargs.get('username')
-        posts = Post.objects.all(
-        ).filter(author__username=username
-                 ).order_by('-pub_date')
-        visible_posts = []
-        for post in posts:
-            if post.is_published and (post.pub_date <= timezone.now()
-                                      ) or (self.request.user == post.author):
-                visible_posts.append(post)
-        page_number = self.request.GET.get('page')
-        context['page_obj'] = paginate(posts, page_number)
+        context['page_obj'] = self.page_obj
         return context
 
 
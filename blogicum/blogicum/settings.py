@@ -1,3 +1,5 @@
+import os
+import tempfile
 from pathlib import Path
 
 from django.core.management.utils import get_random_secret_key
@@ -6,7 +8,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = get_random_secret_key()
 
-DEBUG = True
+DEBUG = os.getenv('DJANGO_DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -41,17 +43,28 @@ ROOT_URLCONF = 'blogicum.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+if not DEBUG:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'blog.context_processors.post_cards',
             ],
         },
     },
@@ -67,6 +80,41 @@ DATABASES = {
     }
 }
 
+# Версии тегов кеша (blog.cache.bump_version) должны видеть все процессы
+# сервера, иначе страницы в других процессах не сбрасываются. Поэтому вне
+# DEBUG по умолчанию используется общий файловый кеш, а не LocMemCache;
+# на нескольких серверах задайте DJANGO_CACHE_BACKEND (например,
+# memcached) и DJANGO_CACHE_LOCATION.
+CACHE_BACKEND = os.getenv(
+    'DJANGO_CACHE_BACKEND',
+    'django.core.cache.backends.locmem.LocMemCache' if DEBUG
+    else 'django.core.cache.backends.filebased.FileBasedCache',
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv(
+            'DJANGO_CACHE_LOCATION',
+            '' if DEBUG
+            else os.path.join(tempfile.gettempdir(), 'blogicum_cache'),
+        ),
+    }
+}
+
+# В кеше лежат карточки всех публикаций, страницы, счётчики и версии
+# тегов. При стандартных 300 записях LocMemCache и FileBasedCache почти
+# постоянно удаляют случайную треть записей, а файловый кеш при каждой
+# записи сверх предела ещё и перечитывает свой каталог. Memcached
+# ограничивает себя по памяти и этого параметра не принимает.
+if CACHE_BACKEND in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('DJANGO_CACHE_MAX_ENTRIES', 100_000)),
+    }
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -106,6 +154,18 @@ STATICFILES_DIRS = [
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+
+FILE_UPLOAD_HANDLERS = [
+    'core.uploadhandlers.BoundedTemporaryFileUploadHandler',
+]
+
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+
+MAX_IMAGE_PIXELS = 25_000_000
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
@@ -117,3 +177,19 @@ LOGIN_URL = 'login'
 CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
 
 INTERNAL_IPS = ['127.0.0.1']
+
+PAGINATION_MODES = {
+    'blog:index': 'cursor',
+    'blog:category_posts': 'offset',
+    'blog:profile': 'offset',
+}
+
+PAGINATOR_COUNT_CACHE_TIMEOUT = 60
+
+PAGINATOR_COUNT_ESTIMATE_THRESHOLD = None
+
+POST_CARD_CACHE_TIMEOUT = 60 * 10
+
+ANONYMOUS_PAGE_CACHE_TIMEOUT = None
+
+WARM_TEMPLATES_ON_STARTUP = not DEBUG
@@ -4,6 +4,7 @@ from django.contrib import admin
 from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path, reverse_lazy
 from django.views.generic.edit import CreateView
+from pages.views import serve_media
 
 handler404 = 'pages.views.page_not_found'
 handler500 = 'pages.views.server_error'
@@ -22,4 +23,8 @@ urlpatterns = [
         ),
         name='registration',
     )
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+] + static(
+    settings.MEDIA_URL,
+    view=serve_media,
+    document_root=settings.MEDIA_ROOT,
+)
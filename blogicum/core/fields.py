@@ -0,0 +1,20 @@
+from django.db import models
+from django.utils import timezone
+
+
+class AutoLastModifiedField(models.DateTimeField):
+    """Дата и время последнего изменения записи.
+
+    В отличие от auto_now, у поля есть значение по умолчанию, поэтому
+    записи из фикстур (loaddata) загружаются без него.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('default', timezone.now)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        value = timezone.now()
+        setattr(model_instance, self.attname, value)
+        return value
@@ -0,0 +1,15 @@
+from django.db import models
+
+
+class PartialIndex(models.Index):
+    """Частичный индекс там, где база данных их поддерживает.
+
+    Django не создаёт индекс с condition на MySQL и других базах без
+    частичных индексов. Этот индекс создаётся на них без условия: он
+    больше, но запросы по-прежнему его используют.
+    """
+
+    def _get_condition_sql(self, model, schema_editor):
+        if not schema_editor.connection.features.supports_partial_indexes:
+            return None
+        return super()._get_condition_sql(model, schema_editor)
@@ -1,5 +1,13 @@
 from django.db import models
 
+from .fields import AutoLastModifiedField
+
+
+class BaseQuerySet(models.QuerySet):
+
+    def changed_since(self, moment):
+        return self.filter(updated_at__gte=moment)
+
 
 class BaseModel(models.Model):
     is_published = models.BooleanField(
@@ -8,6 +16,9 @@ class BaseModel(models.Model):
         help_text='Снимите галочку, чтобы скрыть публикацию.'
     )
     created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    updated_at = AutoLastModifiedField('Изменено', db_index=True)
+
+    objects = BaseQuerySet.as_manager()
 
     class Meta:
         abstract = True
@@ -0,0 +1,71 @@
+import hashlib
+import os
+import re
+from pathlib import PurePosixPath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASHED_NAME_RE = re.compile(r'(?:^|/)[0-9a-f]{2}/[0-9a-f]{64}(?:\.\w+)?$')
+
+
+def get_content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_content_addressed(name):
+    return bool(HASHED_NAME_RE.search(name))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, в котором имя файла — хеш SHA-256 его содержимого.
+
+    Файл читается порциями, поэтому загрузка не поднимается в память
+    целиком. Файл сохраняется как <каталог>/<xx>/<sha256><расширение>, где
+    каталог — upload_to поля, а xx — первые два символа хеша. Одинаковые
+    файлы сохраняются один раз: повторная загрузка получает имя уже
+    существующего файла.
+    """
+
+    def get_hashed_name(self, name, content):
+        path = PurePosixPath(name)
+        directory = path.parent
+        if is_content_addressed(name):
+            # Файл получен из уже сохранённого (очищенная копия, уменьшенная
+            # копия): кладём его в тот же каталог, а не на уровень глубже.
+            directory = directory.parent
+        digest = get_content_hash(content)
+        return str(directory / digest[:2] / f'{digest}{path.suffix.lower()}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_hashed_name(name, content)
+        if not self.exists(name):
+            try:
+                return super().save(name, content, max_length)
+            except FileExistsError:
+                # Такой же файл только что сохранила параллельная загрузка.
+                pass
+        self.touch(name)
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # Имя задано содержимым: вместо имени с суффиксом сообщаем, что
+        # такой файл уже есть, и save() использует его.
+        if self.exists(name):
+            raise FileExistsError(name)
+        return name
+
+    def touch(self, name):
+        """Обновляет время изменения файла, который снова используется.
+
+        Иначе delete_unused_media может счесть старый файл ненужным,
+        пока публикация с новой ссылкой на него ещё не сохранена.
+        """
+        os.utime(self.path(name))
@@ -0,0 +1,77 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import (
+    FileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+
+class OversizedUploadedFile(UploadedFile):
+    """Файл больше MAX_UPLOAD_SIZE: содержимое отброшено, известен размер.
+
+    blog.forms.ImageUploadField отклоняет такой файл с сообщением о
+    размере. Для остальных полей он читается как пустой файл, и
+    forms.ImageField отклоняет его как неправильное изображение.
+    """
+
+    def __init__(self, name, content_type, size, charset,
+                 content_type_extra=None):
+        super().__init__(
+            BytesIO(), name, content_type, size, charset, content_type_extra
+        )
+
+
+class BoundedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загружаемые файлы во временные файлы, а не в память.
+
+    Как только файл превышает MAX_UPLOAD_SIZE, временный файл удаляется,
+    а остаток загрузки пропускается. Если размер известен заранее
+    из заголовков запроса, на диск не пишется ничего.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        fields_size = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        self.request_too_large = fields_size is not None and (
+            content_length > settings.MAX_UPLOAD_SIZE + fields_size
+        )
+
+    def new_file(self, field_name, file_name, content_type, content_length,
+                 *args, **kwargs):
+        self.received = 0
+        self.oversized = getattr(self, 'request_too_large', False) or (
+            content_length or 0
+        ) > settings.MAX_UPLOAD_SIZE
+        if self.oversized:
+            FileUploadHandler.new_file(
+                self, field_name, file_name, content_type, content_length,
+                *args, **kwargs
+            )
+        else:
+            super().new_file(
+                field_name, file_name, content_type, content_length,
+                *args, **kwargs
+            )
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.oversized:
+            return None
+        if self.received > settings.MAX_UPLOAD_SIZE:
+            self.oversized = True
+            self.file.close()
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.oversized:
+            return OversizedUploadedFile(
+                self.file_name,
+                self.content_type,
+                self.received,
+                self.charset,
+                self.content_type_extra,
+            )
+        return super().file_complete(file_size)
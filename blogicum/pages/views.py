@@ -1,12 +1,17 @@
+from blog.cache import AnonymousPageCacheMixin
+from core.storage import is_content_addressed
+from django.conf import settings
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control
 from django.views.generic import TemplateView
+from django.views.static import serve
 
 
-class About(TemplateView):
+class About(AnonymousPageCacheMixin, TemplateView):
     template_name = 'pages/about.html'
 
 
-class Rules(TemplateView):
+class Rules(AnonymousPageCacheMixin, TemplateView):
     template_name = 'pages/rules.html'
 
 
@@ -20,3 +25,16 @@ def csrf_failure(request, reason=''):
 
 def server_error(request):
     return render(request, 'pages/500.html', status=500)
+
+
+def serve_media(request, path, document_root=None):
+    """Отдаёт загруженный файл; файлы с хешем в имени кешируются навсегда."""
+    response = serve(request, path, document_root=document_root)
+    if response.status_code == 200 and is_content_addressed(path):
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.MEDIA_CACHE_MAX_AGE,
+            immutable=True,
+        )
+    return response
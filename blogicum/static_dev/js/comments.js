@@ -0,0 +1,12 @@
+// Подгружает следующую порцию комментариев на место ссылки «Показать ещё».
+// Без JavaScript ссылка открывает страницу публикации со следующей порцией.
+document.getElementById('comments').addEventListener('click', function (event) {
+  const link = event.target.closest('[data-fragment-url]');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  fetch(link.dataset.fragmentUrl)
+    .then((response) => response.text())
+    .then((html) => { link.outerHTML = html; });
+});
@@ -37,6 +37,25 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(tmp_path_factory):
+    # A file-backed SQLite database lets concurrent connections wait for
+    # each other instead of failing with "database table is locked".
+    from django.db import connections
+
+    connections["default"].settings_dict["TEST"]["NAME"] = str(
+        tmp_path_factory.mktemp("db") / "test.sqlite3"
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -359,6 +378,7 @@ def cleanup(request):
                     filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
+                    or filename.endswith(".webp")
             ):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
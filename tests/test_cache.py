@@ -0,0 +1,300 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_cards_are_cached_until_changed(
+        client, post_with_published_location
+):
+    from blog.models import Post
+
+    post = post_with_published_location
+    assert post.title in client.get('/').content.decode('utf-8')
+
+    Post.objects.filter(pk=post.pk).update(title='Заголовок мимо сигналов')
+    content = client.get('/').content.decode('utf-8')
+    assert post.title in content, (
+        'Убедитесь, что карточки публикаций берутся из кеша.'
+    )
+
+    post.refresh_from_db()
+    post.save()
+    content = client.get('/').content.decode('utf-8')
+    assert 'Заголовок мимо сигналов' in content, (
+        'Убедитесь, что кеш карточек сбрасывается при изменении публикации.'
+    )
+
+
+def test_post_card_cache_follows_related_objects(
+        client, user, post_with_published_location
+):
+    post = post_with_published_location
+    client.get('/')
+
+    post.category.title = 'Новая категория'
+    post.category.save()
+    assert 'Новая категория' in client.get('/').content.decode('utf-8')
+
+    user.username = 'renamed_author'
+    user.save()
+    assert '@renamed_author' in client.get('/').content.decode('utf-8')
+
+
+def test_post_card_cache_is_per_post(client, mixer, published_category):
+    posts = mixer.cycle(3).blend(
+        'blog.Post',
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+    client.get('/')
+    posts[0].title = 'Новый заголовок'
+    posts[0].save()
+    with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+        content = client.get('/').content.decode('utf-8')
+    assert 'Новый заголовок' in content
+    rendered = [
+        args[0] for args, _ in cache_set.call_args_list
+        if args[0].startswith('post_card:')
+    ]
+    assert len(rendered) == 1, (
+        'Убедитесь, что изменение публикации сбрасывает только её карточку, '
+        'а не карточки всех публикаций.'
+    )
+
+
+@override_settings(ANONYMOUS_PAGE_CACHE_TIMEOUT=60)
+@pytest.mark.parametrize('url', ['/', '/posts/{post.id}/', '/pages/about/'])
+def test_anonymous_pages_are_served_from_cache(
+        client, user_client, post_with_published_location, url
+):
+    url = url.format(post=post_with_published_location)
+    first = client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get(url)
+    assert second.content == first.content
+    assert len(queries) == 0, (
+        'Убедитесь, что повторный запрос анонимного посетителя отдаётся '
+        'из кеша страниц без обращения к базе данных.'
+    )
+    with CaptureQueriesContext(connection) as queries:
+        user_client.get(url)
+    assert len(queries) > 0, (
+        'Убедитесь, что авторизованным пользователям страницы из кеша '
+        'не отдаются.'
+    )
+
+
+@override_settings(ANONYMOUS_PAGE_CACHE_TIMEOUT=60)
+def test_page_cache_is_invalidated_by_writes(
+        client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    url = f'/posts/{post.id}/'
+    client.get(url)
+    comment = mixer.blend('blog.Comment', post=post)
+    content = client.get(url).content.decode('utf-8')
+    assert f'name="comment_{comment.id}"' in content, (
+        'Убедитесь, что кеш страниц сбрасывается при добавлении комментария.'
+    )
+    post.location.name = 'Новое место'
+    post.location.save()
+    assert 'Новое место' in client.get('/').content.decode('utf-8')
+
+
+@override_settings(ANONYMOUS_PAGE_CACHE_TIMEOUT=3600)
+def test_page_cache_expires_at_next_publication_of_listing(
+        mixer, published_category
+):
+    from blog.views import CategoryPosts, Index
+
+    other_category = mixer.blend('blog.Category', is_published=True)
+    mixer.blend(
+        'blog.Post',
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() + timedelta(seconds=30),
+    )
+    index = Index(kwargs={})
+    assert 1 <= index.get_page_cache_timeout() <= 30, (
+        'Убедитесь, что страница не кешируется дольше, чем до ближайшей '
+        'отложенной публикации.'
+    )
+    other = CategoryPosts(kwargs={'category_slug': other_category.slug})
+    assert other.get_page_cache_timeout() == 3600, (
+        'Убедитесь, что отложенная публикация ограничивает время кеширования '
+        'только тех списков, в которые она попадёт.'
+    )
+    with CaptureQueriesContext(connection) as queries:
+        index.get_page_cache_timeout()
+    assert len(queries) == 0
+
+
+@override_settings(PAGINATOR_COUNT_CACHE_TIMEOUT=3600)
+def test_count_cache_expires_at_next_publication(published_category):
+    from blog.models import Post
+    from blog.utils import CachedCountPaginator
+
+    paginator = CachedCountPaginator(
+        Post.objects.published(),
+        10,
+        count_key='test',
+        expires_at=timezone.now() + timedelta(seconds=30),
+    )
+    with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+        assert paginator.count == 0
+    (key, count, timeout), _ = cache_set.call_args
+    assert 1 <= timeout <= 30, (
+        'Убедитесь, что число публикаций в кеше хранится не дольше, '
+        'чем до ближайшей отложенной публикации.'
+    )
+
+
+@pytest.mark.parametrize(
+    'url',
+    [
+        '/',
+        '/category/{post.category.slug}/',
+        '/profile/{post.author.username}/',
+        '/posts/{post.id}/',
+    ],
+)
+def test_unchanged_pages_return_not_modified(
+        client, post_with_published_location, url
+):
+    post = post_with_published_location
+    url = url.format(post=post)
+    response = client.get(url)
+    assert response.has_header('ETag') and response.has_header(
+        'Last-Modified'
+    ), 'Убедитесь, что страницы блога отдают заголовки ETag и Last-Modified.'
+
+    not_modified = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert not_modified.status_code == 304, (
+        'Убедитесь, что для неизменившейся страницы возвращается '
+        '304 Not Modified.'
+    )
+    assert not not_modified.templates
+
+    post.title = 'Новый заголовок'
+    post.save()
+    changed = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert changed.status_code == 200, (
+        'Убедитесь, что после изменения публикации страница отдаётся заново.'
+    )
+    assert changed['ETag'] != response['ETag']
+
+
+def test_last_modified_grows_after_delete(
+        client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    other = mixer.blend(
+        'blog.Post',
+        category=post.category,
+        location=post.location,
+        is_published=True,
+        pub_date=post.pub_date - timedelta(days=1),
+    )
+    url = f'/category/{post.category.slug}/'
+    last_modified = client.get(url)['Last-Modified']
+    later = time.time_ns() + 2 * 10 ** 9
+    with mock.patch('blog.cache.time.time_ns', return_value=later):
+        post.delete()
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 200, (
+        'Убедитесь, что после удаления публикации страница со списком '
+        'не отдаётся как 304 по заголовку If-Modified-Since.'
+    )
+    content = response.content.decode('utf-8')
+    assert post.title not in content and other.title in content
+
+
+def test_etag_follows_comments_and_viewer(
+        client, user_client, mixer, post_with_published_location
+):
+    url = f'/posts/{post_with_published_location.id}/'
+    etag = client.get(url)['ETag']
+    assert user_client.get(url)['ETag'] != etag, (
+        'Убедитесь, что ETag зависит от пользователя, просматривающего '
+        'страницу.'
+    )
+    mixer.blend('blog.Comment', post=post_with_published_location)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        'Убедитесь, что ETag страницы публикации меняется при добавлении '
+        'комментария.'
+    )
+
+
+@override_settings(ANONYMOUS_PAGE_CACHE_TIMEOUT=60)
+def test_page_cache_answers_conditional_requests(
+        client, post_with_published_location
+):
+    etag = client.get('/')['ETag']
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert len(queries) == 0
+
+
+def test_objects_without_updated_at_load_from_fixtures():
+    from blog.models import Location
+    from django.core import serializers
+
+    data = (
+        '[{"model": "blog.location", "pk": 1, "fields": {"name": "Место", '
+        '"is_published": true, "created_at": "2022-12-18T23:06:18Z"}}]'
+    )
+    for obj in serializers.deserialize('json', data):
+        obj.save()
+    assert Location.objects.get(pk=1).updated_at is not None, (
+        'Убедитесь, что фикстуры без поля updated_at загружаются.'
+    )
+
+
+@override_settings(ANONYMOUS_PAGE_CACHE_TIMEOUT=60)
+def test_cascade_delete_of_comments_is_not_per_row(
+        client, mixer, user, post_with_published_location
+):
+    from blog.models import Comment
+
+    post = post_with_published_location
+    comment = mixer.blend('blog.Comment', post=post, author=user)
+    mixer.cycle(20).blend('blog.Comment', post=post)
+    url = f'/posts/{post.id}/'
+    client.get(url)
+    Comment.objects.filter(pk=comment.pk).delete()
+    assert f'name="comment_{comment.id}"' not in (
+        client.get(url).content.decode('utf-8')
+    ), 'Убедитесь, что кеш страниц сбрасывается при удалении комментария.'
+
+    with CaptureQueriesContext(connection) as queries:
+        post.delete()
+    assert not any(
+        query['sql'].startswith('SELECT')
+        and 'FROM "blog_comment"' in query['sql']
+        for query in queries.captured_queries
+    ), (
+        'Убедитесь, что комментарии удаляются каскадом одним запросом, '
+        'без загрузки каждого комментария.'
+    )
+    assert client.get(url).status_code == 404
+
+
+def test_cache_is_not_culled_at_default_size():
+    from django.core.cache import caches
+
+    assert caches['default']._max_entries >= 10_000, (
+        'Убедитесь, что для кеша задан MAX_ENTRIES: при стандартных 300 '
+        'записях карточки и версии тегов постоянно вытесняются.'
+    )
@@ -0,0 +1,196 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+
+N_CONCURRENT_COMMENTS = 200
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_comments_keep_exact_count(
+        user, post_with_published_location
+):
+    post = post_with_published_location
+    logged_in = Client()
+    logged_in.force_login(user)
+
+    def add_comment(i):
+        client = Client()
+        client.cookies = logged_in.cookies
+        try:
+            return client.post(
+                f'/posts/{post.id}/comment/', {'text': f'Комментарий {i}'}
+            ).status_code
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        statuses = list(
+            executor.map(add_comment, range(N_CONCURRENT_COMMENTS))
+        )
+
+    assert statuses == [302] * N_CONCURRENT_COMMENTS
+    post.refresh_from_db()
+    assert post.comment_count == N_CONCURRENT_COMMENTS, (
+        'Убедитесь, что счётчик комментариев не теряет изменения при '
+        'одновременном добавлении комментариев.'
+    )
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(mixer, post_with_published_location):
+    from blog.models import Post
+
+    post = post_with_published_location
+    empty_post = mixer.blend('blog.Post')
+    mixer.cycle(3).blend('blog.Comment', post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=10)
+    Post.objects.filter(pk=empty_post.pk).update(comment_count=2)
+
+    out = StringIO()
+    call_command('recount_comments', '--dry-run', batch_size=1, stdout=out)
+    assert 'Расходится: 2' in out.getvalue()
+    post.refresh_from_db()
+    assert post.comment_count == 10
+
+    call_command('recount_comments', batch_size=1, stdout=StringIO())
+    assert dict(Post.objects.values_list('pk', 'comment_count')) == {
+        post.pk: 3,
+        empty_post.pk: 0,
+    }
+
+
+@pytest.mark.django_db
+def test_recount_comments_since(mixer, post_with_published_location):
+    from blog.models import Comment, Post
+
+    long_ago = timezone.now() - timedelta(days=30)
+    old_post = mixer.blend('blog.Post')
+    mixer.blend('blog.Comment', post=old_post)
+    Comment.objects.filter(post=old_post).update(updated_at=long_ago)
+    Post.objects.filter(pk=old_post.pk).update(
+        comment_count=5, updated_at=long_ago
+    )
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(updated_at=long_ago)
+    mixer.blend('blog.Comment', post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=7)
+
+    assert list(Post.objects.changed_since(long_ago + timedelta(days=1))) == []
+    out = StringIO()
+    since = (timezone.now() - timedelta(days=1)).isoformat()
+    call_command('recount_comments', since=since, stdout=out)
+    assert 'Проверено публикаций: 1. Исправлено: 1.' in out.getvalue(), (
+        'Убедитесь, что с --since проверяются только публикации, которые '
+        'или комментарии к которым изменились после указанного момента.'
+    )
+    assert dict(Post.objects.values_list('pk', 'comment_count')) == {
+        post.pk: 1,
+        old_post.pk: 5,
+    }
+
+    Comment.objects.get(post=old_post).delete()
+    out = StringIO()
+    call_command('recount_comments', since=since, stdout=out)
+    assert 'Исправлено: 1.' in out.getvalue(), (
+        'Убедитесь, что recount_comments --since проверяет публикации, '
+        'у которых удалили комментарии.'
+    )
+    assert Post.objects.get(pk=old_post.pk).comment_count == 0
+
+
+@pytest.mark.django_db
+def test_deleting_comments_marks_posts_changed(
+        mixer, user, post_with_published_location
+):
+    from blog.models import Comment, Post
+
+    long_ago = timezone.now() - timedelta(days=30)
+    other_post = mixer.blend('blog.Post')
+    for target in (post_with_published_location, other_post):
+        mixer.blend('blog.Comment', post=target, author=user)
+    mixer.blend('blog.Comment', post=other_post)
+    Post.objects.update(updated_at=long_ago)
+
+    Comment.objects.filter(post=post_with_published_location).delete()
+    changed = Post.objects.changed_since(long_ago + timedelta(days=1))
+    assert list(changed) == [post_with_published_location]
+
+    Post.objects.update(updated_at=long_ago)
+    user.delete()
+    assert list(changed.all()) == [other_post], (
+        'Убедитесь, что при удалении автора публикации с его комментариями '
+        'отмечаются изменёнными.'
+    )
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_every_write_path(
+        mixer, user, another_user, post_with_published_location
+):
+    from blog.models import Comment, Post
+
+    post = post_with_published_location
+    other_post = mixer.blend('blog.Post')
+    Comment.objects.bulk_create(
+        Comment(post=target, author=author, text='Комментарий')
+        for target in (post, post, other_post)
+        for author in (user, another_user)
+    )
+
+    def counts():
+        return dict(
+            Post.objects.filter(
+                pk__in=(post.pk, other_post.pk)
+            ).values_list('pk', 'comment_count')
+        )
+
+    assert counts() == {post.pk: 4, other_post.pk: 2}
+
+    stale_post = Post.objects.get(pk=post.pk)
+    Comment.objects.filter(post=post, author=user).delete()
+    stale_post.title = 'Новый заголовок'
+    stale_post.save()
+    assert counts() == {post.pk: 2, other_post.pk: 2}, (
+        'Убедитесь, что сохранение публикации не перезаписывает счётчик '
+        'комментариев.'
+    )
+
+    Comment.objects.filter(post=other_post).update(post=post)
+    assert counts() == {post.pk: 4, other_post.pk: 0}
+
+    another_user.delete()
+    assert counts() == {post.pk: 1, other_post.pk: 0}, (
+        'Убедитесь, что счётчик комментариев уменьшается при каскадном '
+        'удалении комментариев.'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_triggers_survive_migrations(mixer, post_with_published_location):
+    from blog.triggers import TRIGGER_NAMES, get_missing_triggers
+    from django.core.checks import run_checks
+
+    assert not get_missing_triggers(connection), (
+        'Убедитесь, что после migrate в базе данных есть триггеры счётчика '
+        'комментариев.'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TRIGGER {TRIGGER_NAMES[0]}')
+    errors = run_checks(databases=['default'])
+    assert [error.id for error in errors] == ['blog.E001'], (
+        'Убедитесь, что проверка blog.E001 сообщает о пропавших триггерах.'
+    )
+
+    call_command('migrate', verbosity=0)
+    assert not get_missing_triggers(connection), (
+        'Убедитесь, что migrate восстанавливает триггеры на SQLite.'
+    )
+    mixer.blend('blog.Comment', post=post_with_published_location)
+    post_with_published_location.refresh_from_db()
+    assert post_with_published_location.comment_count == 1
@@ -0,0 +1,377 @@
+import os
+import re
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+from PIL import Image
+
+pytestmark = [pytest.mark.django_db]
+
+
+def is_hashed(name):
+    from core.storage import is_content_addressed
+
+    return is_content_addressed(name)
+
+
+def make_jpeg(width, height, name='photo.jpg'):
+    content = BytesIO()
+    Image.new('RGB', (width, height), 'teal').save(content, 'JPEG')
+    return SimpleUploadedFile(name, content.getvalue(), 'image/jpeg')
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def process_jobs():
+    out = StringIO()
+    call_command('process_image_jobs', once=True, stdout=out)
+    return out.getvalue()
+
+
+def test_upload_is_processed_in_background(
+        client, media_root, mixer, published_category
+):
+    from blog.models import Post
+
+    photo = make_jpeg(2000, 1000)
+    post = mixer.blend('blog.Post', category=published_category, image=photo)
+    content = client.get('/').content.decode('utf-8')
+    assert 'img/image-processing.svg' in content, (
+        'Убедитесь, что до обработки изображения в карточке публикации '
+        'выводится заглушка.'
+    )
+    assert post.image.url not in content
+
+    assert 'Обработано изображений: 1. С ошибками: 0.' in process_jobs()
+    post = Post.objects.get(pk=post.pk)
+    assert post.image_ready
+    assert sorted(post.image_renditions, key=int) == ['320', '640', '1280'], (
+        'Убедитесь, что обработчик очереди создаёт уменьшенные копии '
+        'изображения.'
+    )
+    for width, name in post.image_renditions.items():
+        with Image.open(media_root / name) as rendition:
+            assert rendition.format == 'WEBP'
+            assert rendition.size == (int(width), int(width) // 2)
+    content = client.get('/').content.decode('utf-8')
+    assert f'{post.image_renditions["640"]} 640w' in content, (
+        'Убедитесь, что в карточке публикации выводится srcset с копиями '
+        'изображения.'
+    )
+    assert 'img/image-processing.svg' not in content
+
+
+def test_worker_strips_exif(media_root, mixer):
+    from blog.models import Post
+
+    content = BytesIO()
+    exif = Image.Exif()
+    exif[0x010F] = 'Камера'
+    Image.new('RGB', (100, 50)).save(content, 'JPEG', exif=exif)
+    post = mixer.blend(
+        'blog.Post',
+        image=SimpleUploadedFile('exif.jpg', content.getvalue()),
+    )
+    original = post.image.name
+    process_jobs()
+    post = Post.objects.get(pk=post.pk)
+    assert post.image.name != original
+    with Image.open(media_root / post.image.name) as image:
+        assert not image.getexif(), (
+            'Убедитесь, что обработчик очереди удаляет EXIF из изображения.'
+        )
+
+
+def test_small_and_broken_images(media_root, mixer):
+    from blog.models import ImageJob, Post
+
+    small = mixer.blend('blog.Post', image=make_jpeg(200, 100))
+    broken = mixer.blend(
+        'blog.Post',
+        image=SimpleUploadedFile('broken.jpg', b'not an image', 'image/jpeg'),
+    )
+    assert 'Обработано изображений: 1. С ошибками: 1.' in process_jobs()
+    assert list(Post.objects.get(pk=small.pk).image_renditions) == ['200']
+    broken = Post.objects.get(pk=broken.pk)
+    assert broken.image_ready and broken.image_renditions == {}
+    assert ImageJob.objects.get(post=broken).status == 'failed'
+
+
+def test_abandoned_last_attempt_fails_job(media_root, mixer):
+    from blog.models import ImageJob, Post
+
+    post = mixer.blend('blog.Post', image=make_jpeg(100, 50))
+    ImageJob.objects.filter(post=post).update(
+        status=ImageJob.Status.RUNNING,
+        attempts=ImageJob.MAX_ATTEMPTS,
+        started_at=timezone.now() - timedelta(hours=1),
+    )
+    assert 'Обработано изображений: 0. С ошибками: 1.' in process_jobs()
+    assert ImageJob.objects.get(post=post).status == 'failed'
+    assert Post.objects.get(pk=post.pk).image_ready, (
+        'Убедитесь, что задание, обработчик которого упал на последней '
+        'попытке, не оставляет публикацию с заглушкой навсегда.'
+    )
+
+
+def test_stale_save_keeps_worker_result(media_root, mixer):
+    from blog.models import Post
+
+    post = mixer.blend('blog.Post', image=make_jpeg(100, 50))
+    stale = Post.objects.get(pk=post.pk)
+    process_jobs()
+    stale.title = 'Новый заголовок'
+    stale.save()
+    post = Post.objects.get(pk=post.pk)
+    assert post.title == 'Новый заголовок'
+    assert post.image_ready and post.image_renditions, (
+        'Убедитесь, что сохранение устаревшего объекта публикации '
+        'не затирает результат обработки изображения.'
+    )
+    assert post.image.name != stale.image.name
+
+
+def test_job_is_claimed_once(mixer):
+    from blog.models import ImageJob
+
+    post = mixer.blend('blog.Post', image='')
+    job = ImageJob.objects.create(post=post, image='post_images/x.jpg')
+    assert ImageJob.objects.claim() == job
+    assert ImageJob.objects.claim() is None, (
+        'Убедитесь, что задание из очереди достаётся только одному '
+        'обработчику.'
+    )
+
+
+def test_backfill_command(media_root, mixer):
+    from blog.models import Post
+
+    post = mixer.blend('blog.Post', image=make_jpeg(800, 400))
+    updated_at = timezone.now() - timedelta(days=1)
+    Post.objects.filter(pk=post.pk).update(
+        image_renditions={}, updated_at=updated_at
+    )
+    mixer.blend('blog.Post', image='')
+    out = StringIO()
+    call_command('make_image_renditions', workers=2, stdout=out)
+    assert 'Обработано изображений: 1.' in out.getvalue()
+    post.refresh_from_db()
+    assert sorted(post.image_renditions, key=int) == ['320', '640', '800']
+    assert post.updated_at > updated_at, (
+        'Убедитесь, что команда make_image_renditions обновляет updated_at, '
+        'чтобы страницы с новыми копиями не отдавались как 304.'
+    )
+
+
+def test_identical_uploads_share_file(media_root, mixer):
+    first = mixer.blend('blog.Post', image=make_jpeg(100, 50, 'a.JPG'))
+    second = mixer.blend('blog.Post', image=make_jpeg(100, 50, 'b.jpg'))
+    assert first.image.name == second.image.name, (
+        'Убедитесь, что одинаковые изображения сохраняются в один файл.'
+    )
+    assert is_hashed(first.image.name)
+    assert len(list(media_root.rglob('*.jpg'))) == 1
+
+
+def test_processed_files_keep_hashed_layout(media_root, mixer):
+    from blog.models import Post
+
+    post = mixer.blend('blog.Post', image=make_jpeg(700, 350))
+    process_jobs()
+    post = Post.objects.get(pk=post.pk)
+    hashed_name = r'post_images/[0-9a-f]{2}/[0-9a-f]{64}\.%s'
+    assert re.fullmatch(hashed_name % 'jpg', post.image.name), (
+        'Убедитесь, что очищенное изображение сохраняется в каталог '
+        f'post_images/xx/ под хешем содержимого, а не в {post.image.name}.'
+    )
+    for name in post.image_renditions.values():
+        assert re.fullmatch(hashed_name % 'webp', name), (
+            'Убедитесь, что уменьшенные копии сохраняются в каталог '
+            f'post_images/xx/ под хешем содержимого, а не в {name}.'
+        )
+
+
+def test_reused_file_is_protected_from_collection(media_root, mixer):
+    from django.core.files.storage import default_storage
+
+    post = mixer.blend('blog.Post', image=make_jpeg(100, 50))
+    path = media_root / post.image.name
+    os.utime(path, (0, 0))
+    post.delete()
+    # Файл уже сохранён, а публикация со ссылкой на него ещё нет.
+    name = default_storage.save('post_images/photo.jpg', make_jpeg(100, 50))
+    assert name == post.image.name
+    out = StringIO()
+    call_command('delete_unused_media', stdout=out)
+    assert path.exists(), (
+        'Убедитесь, что повторно загруженный файл не удаляется командой '
+        'delete_unused_media, даже если он старше --min-age.'
+    )
+
+
+def test_concurrent_identical_upload_keeps_hashed_name(media_root, mixer):
+    from django.core.files.storage import default_storage
+
+    name = mixer.blend('blog.Post', image=make_jpeg(100, 50)).image.name
+    with mock.patch.object(
+        default_storage, 'exists', side_effect=[False, True]
+    ):
+        saved = default_storage.save(
+            'post_images/photo.jpg', make_jpeg(100, 50)
+        )
+    assert saved == name, (
+        'Убедитесь, что одновременная загрузка одинаковых файлов не '
+        'добавляет к имени файла случайный суффикс.'
+    )
+    assert len(list(media_root.rglob('*.jpg'))) == 1
+
+
+def test_unused_media_are_deleted(media_root, mixer):
+    from blog.models import Post
+
+    post = mixer.blend('blog.Post', image=make_jpeg(100, 50))
+    process_jobs()
+    post = Post.objects.get(pk=post.pk)
+    post.image = make_jpeg(60, 30)
+    post.save()
+    process_jobs()
+    post = Post.objects.get(pk=post.pk)
+    used = {post.image.name, *post.image_renditions.values()}
+    stored = {
+        str(path.relative_to(media_root)) for path in media_root.rglob('*.*')
+    }
+    out = StringIO()
+    call_command('delete_unused_media', min_age=0, stdout=out)
+    assert f'Удалено файлов: {len(stored - used)}.' in out.getvalue()
+    remaining = {
+        str(path.relative_to(media_root)) for path in media_root.rglob('*.*')
+    }
+    assert remaining == used, (
+        'Убедитесь, что команда delete_unused_media удаляет файлы, '
+        'на которые не ссылаются публикации, и только их.'
+    )
+
+    out = StringIO()
+    call_command('delete_unused_media', stdout=out)
+    assert 'Удалено файлов: 0.' in out.getvalue()
+
+
+def test_hashed_media_are_cached_forever(rf, media_root, mixer):
+    from pages.views import serve_media
+
+    post = mixer.blend('blog.Post', image=make_jpeg(100, 50))
+    response = serve_media(
+        rf.get(post.image.url), post.image.name, document_root=media_root
+    )
+    assert response.status_code == 200
+    assert 'immutable' in response['Cache-Control'], (
+        'Убедитесь, что файлы с хешем содержимого в имени отдаются '
+        'с заголовком Cache-Control: immutable.'
+    )
+
+
+def post_form_data(published_category):
+    return {
+        'title': 'Заголовок',
+        'text': 'Текст',
+        'pub_date': '2020-01-01T00:00',
+        'category': published_category.id,
+    }
+
+
+@pytest.mark.parametrize(
+    'limits, photo, error',
+    [
+        (
+            {'MAX_UPLOAD_SIZE': 1024},
+            make_jpeg(400, 200),
+            'Размер файла не должен превышать',
+        ),
+        (
+            {'MAX_IMAGE_PIXELS': 10_000},
+            make_jpeg(400, 200),
+            'Изображение должно быть не больше 0.01 мегапикселей',
+        ),
+    ],
+    ids=['file size', 'pixel count'],
+)
+def test_oversized_uploads_are_rejected(
+        settings, user_client, media_root, published_category,
+        limits, photo, error
+):
+    from blog.models import Post
+
+    for name, value in limits.items():
+        setattr(settings, name, value)
+    photo.seek(0)
+    with mock.patch.object(Image.Image, 'load') as load:
+        response = user_client.post(
+            '/posts/create/',
+            {**post_form_data(published_category), 'image': photo},
+        )
+    assert error in response.content.decode('utf-8'), (
+        'Убедитесь, что слишком большие изображения отклоняются формой '
+        'публикации с понятным сообщением.'
+    )
+    load.assert_not_called()
+    assert not Post.objects.exists()
+    assert not any(media_root.iterdir())
+
+
+def test_upload_is_streamed_to_temporary_file(
+        settings, rf, published_category
+):
+    from blog.forms import CreateOrEditPostForm
+
+    settings.FILE_UPLOAD_MAX_MEMORY_SIZE = 10 ** 9
+    request = rf.post(
+        '/posts/create/',
+        {
+            **post_form_data(published_category),
+            'image': make_jpeg(400, 200),
+        },
+    )
+    image = request.FILES['image']
+    assert hasattr(image, 'temporary_file_path'), (
+        'Убедитесь, что загружаемые файлы пишутся во временный файл, '
+        'а не держатся в памяти.'
+    )
+    form = CreateOrEditPostForm(request.POST, request.FILES)
+    with mock.patch.object(Image.Image, 'verify') as verify:
+        assert form.is_valid(), form.errors
+    verify.assert_not_called()
+
+
+def test_oversized_upload_is_invalid_for_any_image_field(rf, admin_user):
+    from blog.forms import ImageUploadField
+    from blog.models import Post
+    from core.uploadhandlers import OversizedUploadedFile
+    from django import forms
+    from django.contrib import admin
+
+    oversized = OversizedUploadedFile(
+        'photo.jpg', 'image/jpeg', 10 ** 9, None
+    )
+    with pytest.raises(forms.ValidationError) as error:
+        forms.ImageField().clean(oversized)
+    assert error.value.code == 'invalid_image', (
+        'Убедитесь, что отброшенный из-за размера файл отклоняется любым '
+        'полем изображения как ошибка валидации.'
+    )
+
+    request = rf.get('/admin/blog/post/add/')
+    request.user = admin_user
+    form = admin.site._registry[Post].get_form(request)
+    assert isinstance(form.base_fields['image'], ImageUploadField), (
+        'Убедитесь, что форма публикации в админке ограничивает размер '
+        'изображения так же, как форма на сайте.'
+    )
@@ -0,0 +1,174 @@
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+from conftest import N_PER_PAGE
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+CURSOR_MODE = {'blog:index': 'cursor'}
+
+
+@pytest.fixture
+def feed_posts(mixer, user, published_category):
+    start = datetime.now(tz=pytz.UTC) - timedelta(days=30)
+    pub_dates = (start + timedelta(hours=i) for i in range(N_PER_PAGE * 3))
+    return mixer.cycle(N_PER_PAGE * 3).blend(
+        'blog.Post',
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=pub_dates,
+    )
+
+
+@override_settings(PAGINATION_MODES=CURSOR_MODE)
+def test_cursor_pagination_walks_feed(client, feed_posts):
+    expected = sorted(
+        feed_posts, key=lambda post: (post.pub_date, post.pk), reverse=True
+    )
+    seen = []
+    url = '/'
+    while url:
+        page_obj = client.get(url).context['page_obj']
+        assert len(page_obj) <= N_PER_PAGE
+        seen.extend(page_obj)
+        url = (
+            f'/?after={page_obj.next_cursor}' if page_obj.has_next() else None
+        )
+    assert seen == expected, (
+        'Убедитесь, что при курсорной пагинации публикации не повторяются и '
+        'не пропускаются, а порядок «от новых к старым» сохраняется.'
+    )
+
+
+@override_settings(PAGINATION_MODES=CURSOR_MODE)
+def test_cursor_pagination_goes_back(client, feed_posts):
+    first_page = client.get('/').context['page_obj']
+    second_page = client.get(
+        f'/?after={first_page.next_cursor}'
+    ).context['page_obj']
+    assert second_page.has_previous()
+    back = client.get(f'/?before={second_page.previous_cursor}')
+    assert list(back.context['page_obj']) == list(first_page)
+
+
+@override_settings(PAGINATION_MODES=CURSOR_MODE)
+def test_cursor_pagination_skips_count(client, feed_posts):
+    next_cursor = client.get('/').context['page_obj'].next_cursor
+    with CaptureQueriesContext(connection) as queries:
+        client.get(f'/?after={next_cursor}')
+    assert not any(
+        'COUNT(' in query['sql'] for query in queries.captured_queries
+    ), 'Курсорная пагинация не должна выполнять COUNT(*).'
+
+
+@override_settings(PAGINATION_MODES=CURSOR_MODE)
+def test_cursor_pagination_ignores_broken_token(client, feed_posts):
+    response = client.get('/?after=not-a-cursor')
+    assert response.status_code == 200
+    assert len(response.context['page_obj']) == N_PER_PAGE
+
+
+@pytest.mark.parametrize(
+    'url',
+    [
+        '/?after={token}',
+        '/posts/{post.id}/?comments_after={token}',
+        '/posts/{post.id}/comments/?after={token}',
+    ],
+)
+def test_cursor_with_broken_date_is_ignored(
+        client, post_with_published_location, url
+):
+    token = base64.urlsafe_b64encode(b'garbage|5').decode().rstrip('=')
+    response = client.get(
+        url.format(post=post_with_published_location, token=token)
+    )
+    assert response.status_code == 200, (
+        'Убедитесь, что курсор с некорректной датой не приводит к ошибке.'
+    )
+
+
+def test_offset_pagination_caches_count(
+        client, published_category, feed_posts, mixer, user
+):
+    url = f'/category/{published_category.slug}/'
+    client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.context['page_obj'].paginator.count == len(feed_posts)
+    assert not any(
+        'COUNT(' in query['sql'] for query in queries.captured_queries
+    ), 'Убедитесь, что число публикаций для пагинации берётся из кеша.'
+
+    mixer.blend(
+        'blog.Post',
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=datetime.now(tz=pytz.UTC) - timedelta(days=1),
+    )
+    response = client.get(url)
+    assert response.context['page_obj'].paginator.count == (
+        len(feed_posts) + 1
+    ), 'Убедитесь, что кеш числа публикаций сбрасывается при их изменении.'
+
+
+@pytest.mark.parametrize('total_pages', [50, 2_000, 20_000])
+def test_paginator_renders_page_window(rf, total_pages):
+    from blog.utils import PostsPaginator
+    from django.template.loader import render_to_string
+
+    paginator = PostsPaginator(range(total_pages * N_PER_PAGE), N_PER_PAGE)
+    page_obj = paginator.get_page(total_pages // 2)
+    html = render_to_string(
+        'includes/paginator.html', {'page_obj': page_obj}, request=rf.get('/')
+    )
+    assert html.count('<li') <= 13, (
+        'Убедитесь, что пагинатор выводит ограниченное окно страниц, '
+        'а не ссылку на каждую страницу.'
+    )
+    assert f'?page={total_pages}"' in html
+    assert f'?page={total_pages // 2 + 1}"' in html
+
+
+def test_comment_thread_is_paginated(
+        client, mixer, post_with_published_location
+):
+    from blog.utils import COMMENTS_PER_PAGE
+
+    post = post_with_published_location
+    comments = mixer.cycle(COMMENTS_PER_PAGE * 2 + 5).blend(
+        'blog.Comment', post=post
+    )
+    page = client.get(f'/posts/{post.id}/').context['comments']
+    assert len(page) == COMMENTS_PER_PAGE, (
+        'Убедитесь, что на странице публикации комментарии выводятся '
+        'порциями, а не все сразу.'
+    )
+    seen = list(page)
+    while page.has_next():
+        response = client.get(
+            f'/posts/{post.id}/comments/?after={page.next_cursor}'
+        )
+        assert response.status_code == 200
+        assert '<html' not in response.content.decode('utf-8')
+        page = response.context['comments']
+        seen.extend(page)
+    assert seen == comments, (
+        'Убедитесь, что комментарии выводятся «от старых к новым» '
+        'без пропусков и повторов.'
+    )
+
+
+def test_comment_fragment_respects_post_visibility(
+        client, unpublished_posts_with_published_locations
+):
+    post = unpublished_posts_with_published_locations[0]
+    response = client.get(f'/posts/{post.id}/comments/')
+    assert response.status_code == 404
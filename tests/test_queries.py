@@ -0,0 +1,189 @@
+import re
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+import pytz
+from conftest import N_PER_PAGE
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def create_posts(mixer, n, category, author=None):
+    start = datetime.now(tz=pytz.UTC) - timedelta(days=30)
+    locations = mixer.cycle(n).blend('blog.Location', is_published=True)
+    kwargs = {'author': author} if author else {}
+    return mixer.cycle(n).blend(
+        'blog.Post',
+        category=category,
+        location=mixer.sequence(*locations),
+        is_published=True,
+        pub_date=(start + timedelta(hours=i) for i in range(n)),
+        **kwargs,
+    )
+
+
+def assert_no_full_scan(queryset, table='blog_post'):
+    if connection.vendor != 'sqlite':
+        pytest.skip('Проверка плана запроса написана для SQLite.')
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        plan = [row[-1] for row in cursor.fetchall()]
+    full_scan = re.compile(rf'^SCAN (TABLE )?"?{table}"?(?! USING)')
+    assert not any(full_scan.match(step) for step in plan), (
+        f'Запрос к таблице {table} выполняется полным просмотром таблицы. '
+        f'План запроса: {plan}'
+    )
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(queries)
+
+
+@pytest.mark.parametrize('page', ['index', 'category', 'profile'])
+def test_listing_query_budget_does_not_depend_on_page_size(
+        mixer, user, user_client, published_category, page
+):
+    urls = {
+        'index': '/',
+        'category': f'/category/{published_category.slug}/',
+        'profile': f'/profile/{user.username}/',
+    }
+    create_posts(mixer, 2, published_category, author=user)
+    small_page = count_queries(user_client, urls[page])
+    create_posts(mixer, N_PER_PAGE, published_category, author=user)
+    full_page = count_queries(user_client, urls[page])
+    assert small_page == full_page, (
+        'Убедитесь, что число запросов к базе данных на странице со списком '
+        'публикаций не зависит от количества публикаций на странице.'
+    )
+
+
+def test_profile_hides_drafts_from_other_users(
+        user, another_user_client, unpublished_posts_with_published_locations,
+        future_posts, post_with_published_location
+):
+    response = another_user_client.get(f'/profile/{user.username}/')
+    assert list(response.context['page_obj']) == [
+        post_with_published_location
+    ], (
+        'Убедитесь, что на странице пользователя другие пользователи видят '
+        'только опубликованные записи автора.'
+    )
+
+
+PROFILE_QUERY_BUDGET = 5
+
+
+def test_profile_query_budget_for_prolific_author(
+        user, user_client, another_user_client, published_category
+):
+    from blog.models import Post
+
+    start = datetime.now(tz=pytz.UTC) - timedelta(days=365)
+    Post.objects.bulk_create(
+        (
+            Post(
+                title=f'Пост {i}',
+                text='Текст',
+                author=user,
+                category=published_category,
+                is_published=bool(i % 2),
+                pub_date=start + timedelta(minutes=i),
+            )
+            for i in range(50_000)
+        ),
+        batch_size=5_000,
+    )
+    for client in (user_client, another_user_client):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'/profile/{user.username}/?page=100')
+        assert len(response.context['page_obj']) == N_PER_PAGE
+        assert len(queries) <= PROFILE_QUERY_BUDGET, (
+            'Убедитесь, что страница пользователя загружает только публикации '
+            'текущей страницы, а не всю историю автора.'
+        )
+        assert all(
+            'LIMIT' in query['sql'] or 'COUNT(' in query['sql']
+            for query in queries.captured_queries
+            if 'FROM "blog_post"' in query['sql']
+        )
+
+
+def test_listing_queries_use_indexes(mixer, user, published_category):
+    from blog.models import Post
+
+    create_posts(mixer, N_PER_PAGE, published_category, author=user)
+    listings = (
+        Post.objects.for_cards().published(),
+        Post.objects.for_cards().published().filter(
+            category__slug=published_category.slug
+        ),
+        Post.objects.for_cards().filter(author=user).visible_to(user),
+        Post.objects.for_cards().filter(author=user).published(),
+    )
+    for queryset in listings:
+        assert_no_full_scan(queryset.order_by('-pub_date')[:N_PER_PAGE])
+        assert_no_full_scan(queryset.values('pk'))
+
+
+def test_feed_indexes_exist_without_partial_index_support():
+    from blog.models import Post
+
+    editor = connection.schema_editor(collect_sql=True)
+    features = connection.features
+    with mock.patch.object(features, 'supports_partial_indexes', False):
+        statements = [
+            index.create_sql(Post, editor) for index in Post._meta.indexes
+        ]
+    assert all(statements), (
+        'Убедитесь, что индексы лент создаются и на базах данных без '
+        'частичных индексов (например, MySQL).'
+    )
+    assert not any('WHERE' in str(sql) for sql in statements)
+
+
+def test_post_detail_query_count_is_constant(
+        mixer, user_client, another_user, post_with_published_location
+):
+    url = f'/posts/{post_with_published_location.id}/'
+    mixer.blend(
+        'blog.Comment', post=post_with_published_location, author=another_user
+    )
+    one_comment = count_queries(user_client, url)
+    mixer.cycle(5).blend('blog.Comment', post=post_with_published_location)
+    many_comments = count_queries(user_client, url)
+    assert one_comment == many_comments == 4, (
+        'Убедитесь, что страница публикации загружает публикацию вместе со '
+        'связанными объектами одним запросом, а комментарии — вторым.'
+    )
+
+
+def test_listings_do_not_load_post_text(
+        client, mixer, user, published_category
+):
+    from blog.models import Post
+
+    posts = create_posts(mixer, 2, published_category, author=user)
+    post = posts[0]
+    post.text = ' '.join(['слово'] * 20_000)
+    post.save()
+    with CaptureQueriesContext(connection) as queries:
+        content = client.get('/').content.decode('utf-8')
+    assert not any(
+        '"blog_post"."text"' in query['sql']
+        for query in queries.captured_queries
+    ), 'Убедитесь, что ленты не загружают полный текст публикаций.'
+    assert 'слово слово слово слово слово слово слово слово слово слово …' in (
+        content
+    ), 'Убедитесь, что в карточке выводится отрывок текста публикации.'
+
+    post.text = 'Новый текст'
+    post.save(update_fields=['text'])
+    assert Post.objects.get(pk=post.pk).excerpt == 'Новый текст'
@@ -0,0 +1,145 @@
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template.loader import get_template
+from django.test import override_settings
+
+CACHED_TEMPLATES = [
+    {
+        **settings.TEMPLATES[0],
+        'OPTIONS': {
+            **settings.TEMPLATES[0]['OPTIONS'],
+            'loaders': [
+                (
+                    'django.template.loaders.cached.Loader',
+                    [
+                        'django.template.loaders.filesystem.Loader',
+                        'django.template.loaders.app_directories.Loader',
+                    ],
+                ),
+            ],
+        },
+    },
+]
+
+
+@override_settings(TEMPLATES=CACHED_TEMPLATES)
+def test_warm_templates_compiles_everything_up_front():
+    out = StringIO()
+    call_command('warm_templates', stdout=out)
+    assert 'Скомпилировано шаблонов:' in out.getvalue()
+    with mock.patch(
+        'django.template.loaders.filesystem.Loader.get_contents',
+        side_effect=AssertionError('Шаблон прочитан с диска.'),
+    ):
+        for name in ('blog/index.html', 'includes/post_card.html'):
+            get_template(name)
+
+
+@pytest.mark.django_db
+def test_benchmark_templates(post_with_published_location):
+    out = StringIO()
+    call_command('benchmark_templates', repeat=1, stdout=out)
+    assert 'Без кеша шаблонов' in out.getvalue()
+    assert 'С кешем шаблонов' in out.getvalue()
+    assert 'Карточка публикации' not in out.getvalue()
+
+    out = StringIO()
+    call_command(
+        'benchmark_templates', repeat=1, urls=True, cards=True, stdout=out
+    )
+    assert 'cached_reverse()' in out.getvalue()
+    assert 'Карточка публикации' in out.getvalue()
+    assert 'Без кеша шаблонов' not in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_zero_card_timeout_skips_cache(post_with_published_location):
+    from django.template import Context, Template
+
+    template = Template('{% load blog_tags %}{% post_card post %}')
+    context = {'post': post_with_published_location, 'post_card_timeout': 0}
+    with mock.patch.object(cache, 'get') as cache_get:
+        template.render(Context(context))
+    cache_get.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_post_card_template_is_loaded_once_per_render(
+        client, mixer, published_category
+):
+    from django.template import Engine
+    from django.utils import timezone
+
+    mixer.cycle(5).blend(
+        'blog.Post',
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now(),
+    )
+    with mock.patch.object(
+        Engine, 'get_template', autospec=True, side_effect=Engine.get_template
+    ) as engine_get_template:
+        client.get('/')
+    loads = [
+        args[1] for args, _ in engine_get_template.call_args_list
+        if args[1] == 'includes/post_card.html'
+    ]
+    assert len(loads) == 1, (
+        'Убедитесь, что шаблон карточки загружается один раз за отрисовку '
+        'страницы, а не для каждой карточки.'
+    )
+
+
+@pytest.mark.django_db
+def test_post_card_tag_is_shared_by_listing_and_detail(
+        client, post_with_published_location
+):
+    from django.template import Context, Template
+
+    post = post_with_published_location
+    post.text = ' '.join(f'слово{i}' for i in range(20))
+    post.save()
+    template = Template('{% load blog_tags %}{% post_card post detail %}')
+    card = template.render(Context({'post': post, 'detail': False}))
+    assert 'слово9 …' in card and 'слово10' not in card
+    assert f'href="/category/{post.category.slug}/"' in card
+    detail = client.get(f'/posts/{post.id}/').content.decode('utf-8')
+    assert 'слово19' in detail, (
+        'Убедитесь, что на странице публикации выводится полный текст.'
+    )
+    assert detail.count(f'href="/category/{post.category.slug}/"') == 1
+
+    post.category = None
+    post.save()
+    card = template.render(Context({'post': post, 'detail': True}))
+    assert post.title in card, (
+        'Убедитесь, что карточка публикации без категории отрисовывается.'
+    )
+
+
+@pytest.mark.parametrize(
+    'viewname, args',
+    [
+        ('blog:post_detail', (7,)),
+        ('blog:category_posts', ('some-slug',)),
+        ('blog:profile', ('user.name+tag@example',)),
+        ('blog:edit_comment', (3, 14)),
+    ],
+)
+def test_cached_reverse_matches_reverse(viewname, args):
+    from blog.utils import cached_reverse
+    from django.urls import reverse, set_script_prefix
+
+    assert cached_reverse(viewname, *args) == reverse(viewname, args=args)
+    set_script_prefix('/blog/')
+    try:
+        assert cached_reverse(viewname, *args) == reverse(
+            viewname, args=args
+        ), 'Убедитесь, что кеш ссылок учитывает префикс скрипта.'
+    finally:
+        set_script_prefix('/')